@@ -1,9 +1,24 @@
 """Settings for Local RAG System - Python configuration."""
 
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import json
 import os
+import sys
+
+# Optional at import time; only needed once Ollama or system RAM is probed
+try:
+    from src.ollama_api import ollama_models
+except ImportError:
+    ollama_models = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 # Base paths
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -11,12 +26,19 @@ DATA_DIR = PROJECT_ROOT / "data"
 CONFIG_DIR = PROJECT_ROOT / "config"
 LOGS_DIR = PROJECT_ROOT / "logs"
 
-# Create directories if they don't exist
-for dir_path in [DATA_DIR, CONFIG_DIR, LOGS_DIR]:
-    dir_path.mkdir(parents=True, exist_ok=True)
 
+@lru_cache(maxsize=None)
+def _ensure_dir(path: Path) -> Path:
+    """Create ``path`` if needed; repeat calls in a process are free."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
-@dataclass
+
+# Slotted dataclasses (no per-instance __dict__) where the interpreter supports it
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
 class OllamaConfig:
     """Ollama service configuration."""
     base_url: str = "http://localhost:11434"
@@ -24,30 +46,30 @@ class OllamaConfig:
     llm_model: str = "mistral:7b"
     timeout: int = 30
     
+    def _fetch_models(self) -> Optional[List[str]]:
+        """Return installed model names, or None if Ollama can't be reached.
+        
+        Uses the shared probe in src.ollama_api (one keep-alive connection,
+        short timeouts, listing reused for a few seconds).
+        """
+        if ollama_models is None:
+            raise RuntimeError("requests is not installed. Run: pip install requests")
+        try:
+            return list(ollama_models(self.base_url))
+        except (ConnectionError, ValueError, KeyError):
+            return None
+    
     @property
     def is_available(self) -> bool:
         """Check if Ollama service is running."""
-        import requests
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
-            return response.status_code == 200
-        except:
-            return False
+        return self._fetch_models() is not None
     
     def get_installed_models(self) -> List[str]:
         """Get list of installed models."""
-        import requests
-        try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                return [m["name"] for m in models]
-        except:
-            pass
-        return []
+        return list(self._fetch_models() or [])
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class LanceDBConfig:
     """LanceDB configuration."""
     data_dir: Path = DATA_DIR / "lancedb"
@@ -59,25 +81,17 @@ class LanceDBConfig:
     num_sub_vectors: int = 96
     metric: str = "L2"
     nprobes: int = 20
-    
-    def __post_init__(self):
-        """Create data directory if it doesn't exist."""
-        self.data_dir.mkdir(parents=True, exist_ok=True)
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class ChunkingConfig:
     """Document chunking configuration."""
     chunk_size: int = 512
     chunk_overlap: int = 50
-    separators: List[str] = None
-    
-    def __post_init__(self):
-        if self.separators is None:
-            self.separators = ["\n\n", "\n", ". ", ", ", " "]
+    separators: Tuple[str, ...] = ("\n\n", "\n", ". ", ", ", " ")
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class CacheConfig:
     """Caching configuration."""
     enabled: bool = True
@@ -85,15 +99,9 @@ class CacheConfig:
     embedding_cache_dir: Path = DATA_DIR / "embedding_cache"
     max_cache_size_mb: int = 1000
     ttl_days: int = 30
-    
-    def __post_init__(self):
-        """Create cache directories."""
-        if self.enabled:
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
-            self.embedding_cache_dir.mkdir(parents=True, exist_ok=True)
 
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class PerformanceConfig:
     """Performance tuning configuration."""
     batch_size: int = 100
@@ -103,6 +111,54 @@ class PerformanceConfig:
     generation_timeout: int = 30
 
 
+# RAM thresholds (GB) separating the recommendation tiers below
+_RAM_TIERS_GB = (4, 8, 16, 32)
+
+
+@lru_cache(maxsize=8)
+def _recommended_models_for_tier(tier: int) -> Dict[str, str]:
+    """Model recommendations for a RAM tier (index into ``_RAM_TIERS_GB``)."""
+    if tier == 0:
+        return {
+            "embedding": "all-MiniLM-L6-v2",  # Use sentence-transformers
+            "llm": None,  # Too little RAM for local LLM
+            "warning": "Less than 4GB RAM - consider cloud APIs"
+        }
+    elif tier == 1:
+        return {
+            "embedding": "nomic-embed-text",
+            "llm": "phi",
+            "description": "Lightweight setup for basic tasks"
+        }
+    elif tier == 2:
+        return {
+            "embedding": "nomic-embed-text",
+            "llm": "mistral:7b",
+            "description": "Balanced setup for most use cases"
+        }
+    elif tier == 3:
+        return {
+            "embedding": "nomic-embed-text",
+            "llm": "llama2:13b",
+            "description": "High quality setup"
+        }
+    else:
+        return {
+            "embedding": "mxbai-embed-large",
+            "llm": "mixtral:8x7b",
+            "description": "Maximum quality setup"
+        }
+
+
+@lru_cache(maxsize=1)
+def _system_ram_gb() -> float:
+    """Total system RAM in GB, looked up once per process."""
+    if psutil is None:
+        # POSIX fallback so auto-configuration works without psutil
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024**3)
+    return psutil.virtual_memory().total / (1024**3)
+
+
 @dataclass
 class ModelRecommendations:
     """Model recommendations based on system specs."""
@@ -110,47 +166,28 @@ class ModelRecommendations:
     @staticmethod
     def get_recommended_models(ram_gb: float) -> Dict[str, str]:
         """Get recommended models based on available RAM."""
-        if ram_gb < 4:
-            return {
-                "embedding": "all-MiniLM-L6-v2",  # Use sentence-transformers
-                "llm": None,  # Too little RAM for local LLM
-                "warning": "Less than 4GB RAM - consider cloud APIs"
-            }
-        elif ram_gb < 8:
-            return {
-                "embedding": "nomic-embed-text",
-                "llm": "phi",
-                "description": "Lightweight setup for basic tasks"
-            }
-        elif ram_gb < 16:
-            return {
-                "embedding": "nomic-embed-text",
-                "llm": "mistral:7b",
-                "description": "Balanced setup for most use cases"
-            }
-        elif ram_gb < 32:
-            return {
-                "embedding": "nomic-embed-text",
-                "llm": "llama2:13b",
-                "description": "High quality setup"
-            }
-        else:
-            return {
-                "embedding": "mxbai-embed-large",
-                "llm": "mixtral:8x7b",
-                "description": "Maximum quality setup"
-            }
+        tier = sum(ram_gb >= threshold for threshold in _RAM_TIERS_GB)
+        # Copy so callers can't mutate the cached recommendation
+        return dict(_recommended_models_for_tier(tier))
     
     @staticmethod
     def get_system_ram() -> float:
-        """Get system RAM in GB."""
-        import psutil
-        return psutil.virtual_memory().total / (1024**3)
+        """Get system RAM in GB (cached for the process lifetime)."""
+        return _system_ram_gb()
 
 
 class LocalRAGSettings:
     """Main settings class for Local RAG."""
     
+    # Model-name substrings recognised as local LLMs
+    _LLM_FAMILIES = ("mistral", "llama", "phi", "mixtral")
+    # Known embedding models and their vector dimensions
+    _EMBED_DIMS = {
+        "nomic-embed-text": 768,
+        "all-MiniLM-L6-v2": 384,
+        "mxbai-embed-large": 1024,
+    }
+    
     def __init__(
         self,
         ollama_config: Optional[OllamaConfig] = None,
@@ -168,99 +205,204 @@ class LocalRAGSettings:
         # Auto-detect best models if not specified
         self._auto_configure()
     
+    def _auto_config_path(self) -> Path:
+        """Cache file for the auto-detected models of this Ollama server."""
+        key = hashlib.sha1(self.ollama.base_url.encode()).hexdigest()
+        return CONFIG_DIR / f".auto_config_{key}.json"
+    
+    def _load_auto_config(self, requested: Dict[str, str]) -> bool:
+        """Apply a previously resolved configuration if it is still valid.
+        
+        The cache is only reused when the configured (requested) model names
+        match the ones it was resolved from.
+        """
+        try:
+            with open(self._auto_config_path(), "r") as f:
+                cached = json.load(f)
+            if cached.get("requested") != requested:
+                return False
+            self.ollama.embedding_model = cached["embedding_model"]
+            self.ollama.llm_model = cached["llm_model"]
+            self.lancedb.embedding_dim = int(cached["embedding_dim"])
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+    
+    def _save_auto_config(self, requested: Dict[str, str]):
+        """Persist the resolved configuration atomically."""
+        path = self._auto_config_path()
+        tmp_path = path.with_suffix(".json.tmp")
+        try:
+            _ensure_dir(CONFIG_DIR)
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "base_url": self.ollama.base_url,
+                    "requested": requested,
+                    "embedding_model": self.ollama.embedding_model,
+                    "llm_model": self.ollama.llm_model,
+                    "embedding_dim": self.lancedb.embedding_dim,
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not cache auto-configuration: {e}")
+    
     def _auto_configure(self):
-        """Auto-configure based on system specs."""
+        """Auto-configure based on system specs.
+        
+        The resolved models are cached per Ollama URL so later process starts
+        skip the network probe.
+        """
+        requested = {
+            "embedding_model": self.ollama.embedding_model,
+            "llm_model": self.ollama.llm_model,
+        }
+        if self._load_auto_config(requested):
+            return
+        
         try:
+            # Nothing to detect without a server; skip the RAM lookup as well
+            if not self.ollama.is_available:
+                return
+            
             ram_gb = ModelRecommendations.get_system_ram()
             recommendations = ModelRecommendations.get_recommended_models(ram_gb)
             
             # Check if recommended models are installed
             installed = self.ollama.get_installed_models()
             
-            # Use installed models if available
+            # Use installed models if available (first match of each kind)
+            embed_found = llm_found = False
             for model in installed:
-                if "embed" in model.lower():
+                if not embed_found and "embed" in model.lower():
                     self.ollama.embedding_model = model
-                    break
-            
-            for model in installed:
-                if any(llm in model for llm in ["mistral", "llama", "phi", "mixtral"]):
+                    embed_found = True
+                if not llm_found and any(llm in model for llm in self._LLM_FAMILIES):
                     self.ollama.llm_model = model
+                    llm_found = True
+                if embed_found and llm_found:
                     break
             
             # Update embedding dimensions based on model
-            if "nomic-embed-text" in self.ollama.embedding_model:
-                self.lancedb.embedding_dim = 768
-            elif "all-MiniLM-L6-v2" in self.ollama.embedding_model:
-                self.lancedb.embedding_dim = 384
-            elif "mxbai-embed-large" in self.ollama.embedding_model:
-                self.lancedb.embedding_dim = 1024
+            self.lancedb.embedding_dim = next(
+                (dim for name, dim in self._EMBED_DIMS.items()
+                 if name in self.ollama.embedding_model),
+                self.lancedb.embedding_dim
+            )
+            
+            # Only cache a successful probe; retry next start otherwise
+            if installed:
+                self._save_auto_config(requested)
                 
         except Exception as e:
             print(f"Auto-configuration failed: {e}")
     
-    def validate(self) -> Dict[str, bool]:
-        """Validate configuration."""
+    def validate(
+        self,
+        *,
+        available: Optional[bool] = None,
+        models: Optional[List[str]] = None
+    ) -> Dict[str, bool]:
+        """Validate configuration.
+        
+        Read-only: directories are created by the components that write to
+        them (vector store, embedding and chunk caches), so
+        ``directories_exist`` stays False until a pipeline has been created.
+        
+        Args:
+            available: Already-probed Ollama availability, to avoid re-probing.
+            models: Already-fetched installed models, to avoid re-probing.
+        """
+        if available is None:
+            available = self.ollama.is_available
+        if models is None:
+            models = self.ollama.get_installed_models()
         return {
-            "ollama_available": self.ollama.is_available,
-            "models_installed": len(self.ollama.get_installed_models()) > 0,
+            "ollama_available": available,
+            "models_installed": len(models) > 0,
             "directories_exist": all([
-                DATA_DIR.exists(),
-                self.lancedb.data_dir.exists(),
-                self.cache.cache_dir.exists() if self.cache.enabled else True
+                DATA_DIR.is_dir(),
+                self.lancedb.data_dir.is_dir(),
+                self.cache.cache_dir.is_dir() if self.cache.enabled else True
             ])
         }
     
     def get_status(self) -> str:
         """Get configuration status."""
-        validation = self.validate()
-        status = []
+        return "\n".join(self._status_lines())
+    
+    def _status_lines(self) -> Iterator[str]:
+        """Yield the lines of the configuration status report."""
+        yield "LOCAL RAG CONFIGURATION STATUS"
+        yield "=" * 40
         
-        status.append("LOCAL RAG CONFIGURATION STATUS")
-        status.append("=" * 40)
+        # Probe Ollama once and share the result with validate()
+        fetched = self.ollama._fetch_models()
+        models = fetched or []
+        validation = self.validate(available=fetched is not None, models=models)
         
         # Ollama status
         if validation["ollama_available"]:
-            status.append(f"[OK] Ollama running at {self.ollama.base_url}")
-            models = self.ollama.get_installed_models()
+            yield f"[OK] Ollama running at {self.ollama.base_url}"
             if models:
-                status.append(f"[OK] Models installed: {', '.join(models)}")
+                yield f"[OK] Models installed: {', '.join(models)}"
             else:
-                status.append("[WARN] No models installed")
+                yield "[WARN] No models installed"
         else:
-            status.append("[FAIL] Ollama not running")
+            yield "[FAIL] Ollama not running"
         
         # Configuration
-        status.append(f"\nCurrent Configuration:")
-        status.append(f"  Embedding: {self.ollama.embedding_model} ({self.lancedb.embedding_dim}d)")
-        status.append(f"  LLM: {self.ollama.llm_model}")
-        status.append(f"  Vector DB: LanceDB at {self.lancedb.data_dir}")
-        status.append(f"  Chunk size: {self.chunking.chunk_size}")
-        status.append(f"  Cache: {'Enabled' if self.cache.enabled else 'Disabled'}")
+        yield "\nCurrent Configuration:"
+        yield f"  Embedding: {self.ollama.embedding_model} ({self.lancedb.embedding_dim}d)"
+        yield f"  LLM: {self.ollama.llm_model}"
+        yield f"  Vector DB: LanceDB at {self.lancedb.data_dir}"
+        yield f"  Chunk size: {self.chunking.chunk_size}"
+        yield f"  Cache: {'Enabled' if self.cache.enabled else 'Disabled'}"
         
         # System info
         try:
             ram_gb = ModelRecommendations.get_system_ram()
-            status.append(f"\nSystem RAM: {ram_gb:.1f}GB")
             rec = ModelRecommendations.get_recommended_models(ram_gb)
-            if "description" in rec:
-                status.append(f"Recommendation: {rec['description']}")
         except:
-            pass
-        
-        return "\n".join(status)
+            return
+        yield f"\nSystem RAM: {ram_gb:.1f}GB"
+        if "description" in rec:
+            yield f"Recommendation: {rec['description']}"
+
+
+# Default settings instance, built on first access (see ``__getattr__``)
+_settings: Optional[LocalRAGSettings] = None
+
+
+def get_settings() -> LocalRAGSettings:
+    """Return the shared settings instance, creating it on first use."""
+    global _settings
+    if _settings is None:
+        _settings = LocalRAGSettings()
+    return _settings
+
+
+# Export commonly used configs. These never change during auto-configuration,
+# so they come straight from the dataclass defaults without probing Ollama.
+_DEFAULT_CHUNKING = ChunkingConfig()
+OLLAMA_BASE_URL = OllamaConfig().base_url
+CHUNK_SIZE = _DEFAULT_CHUNKING.chunk_size
+CHUNK_OVERLAP = _DEFAULT_CHUNKING.chunk_overlap
+
+# Exports that depend on auto-detected models, resolved lazily
+_LAZY_EXPORTS = {
+    "settings": lambda s: s,
+    "EMBEDDING_MODEL": lambda s: s.ollama.embedding_model,
+    "LLM_MODEL": lambda s: s.ollama.llm_model,
+}
 
 
-# Default settings instance
-settings = LocalRAGSettings()
+def __getattr__(name: str):
+    """Materialize ``settings`` and model exports on first access (PEP 562)."""
+    if name in _LAZY_EXPORTS:
+        return _LAZY_EXPORTS[name](get_settings())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Export commonly used configs
-OLLAMA_BASE_URL = settings.ollama.base_url
-EMBEDDING_MODEL = settings.ollama.embedding_model
-LLM_MODEL = settings.ollama.llm_model
-CHUNK_SIZE = settings.chunking.chunk_size
-CHUNK_OVERLAP = settings.chunking.chunk_overlap
 
 if __name__ == "__main__":
     # Print configuration status when run directly
-    print(settings.get_status())
+    print(get_settings().get_status())
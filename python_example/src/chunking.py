@@ -1,12 +1,76 @@
 """Document chunking utilities for RAG."""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, ClassVar, Iterable, Iterator, Callable, Tuple
 import re
+from collections import deque
 from dataclasses import dataclass
 import logging
+import codecs
+import hashlib
+import itertools
+import mmap
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 logger = logging.getLogger(__name__)
 
+
+def _iter_split_spans(text: str, separator: str) -> Iterator[Tuple[int, int]]:
+    """Lazily yield ``(start, end)`` offsets of the pieces of ``text.split(separator)``."""
+    if not separator:
+        yield 0, len(text)
+        return
+    start = 0
+    sep_len = len(separator)
+    while True:
+        idx = text.find(separator, start)
+        if idx == -1:
+            yield start, len(text)
+            return
+        yield start, idx
+        start = idx + sep_len
+
+
+def iter_file_windows(path: str, window_size: int = 1 << 20) -> Iterator[str]:
+    """
+    Stream a UTF-8 file as text windows of roughly ``window_size`` bytes.
+    
+    The file is memory-mapped and each window ends on a paragraph break
+    where one exists, so only one window is decoded at a time.
+    
+    Args:
+        path: Path to the file.
+        window_size: Target window size in bytes.
+        
+    Yields:
+        Decoded text windows, in file order.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Incremental decoder so a hard cut inside a character is safe
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            size = len(mm)
+            pos = 0
+            while pos < size:
+                end = min(pos + window_size, size)
+                if end < size:
+                    brk = mm.rfind(b"\n\n", pos, end)
+                    if brk > pos:
+                        end = brk + 2
+                text = decoder.decode(mm[pos:end], final=end == size)
+                if text:
+                    yield text
+                pos = end
+
+
 @dataclass
 class Chunk:
     """Represents a document chunk."""
@@ -19,11 +83,24 @@ class Chunk:
 class TextChunker:
     """Text chunking utility with various strategies."""
     
+    # Name of the expensive step whose result chunk_text caches on disk
+    _CACHED_STEP: ClassVar[str] = "_recursive_chunk"
+    # Uncached characters below which chunking stays in-process: serial
+    # chunking runs at tens of MB/s, while each spawned worker re-imports
+    # the application (numpy, LanceDB, ...) before doing any work
+    POOL_MIN_CHARS: ClassVar[int] = 16_000_000
+    # Seconds a chunk cache file is kept (edited documents leave their old
+    # entries behind, so the cache would otherwise only grow)
+    CACHE_TTL: ClassVar[float] = 30 * 24 * 3600
+    
     def __init__(
         self,
         chunk_size: int = 512,
         chunk_overlap: int = 50,
-        separator: str = "\n\n"
+        separator: str = "\n\n",
+        max_workers: int = 4,
+        cache_dir: Optional[str] = None,
+        cache_ttl: Optional[float] = CACHE_TTL
     ):
         """
         Initialize text chunker.
@@ -32,10 +109,23 @@ class TextChunker:
             chunk_size: Maximum size of each chunk in characters.
             chunk_overlap: Number of characters to overlap between chunks.
             separator: Primary separator for splitting text.
+            max_workers: Worker processes used by ``chunk_texts``.
+            cache_dir: Directory to cache chunking results by content hash
+                (disabled if None).
+            cache_ttl: Seconds a cached result is kept; older files are
+                deleted when the chunker is created (None keeps them forever).
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.separator = separator
+        self.max_workers = max_workers
+        
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        if cache_dir is not None:
+            Path(cache_dir, "chunks").mkdir(parents=True, exist_ok=True)
+            if cache_ttl is not None:
+                self._prune_cache()
         
         # Hierarchy of separators to try
         self.separators = [
@@ -46,6 +136,8 @@ class TextChunker:
             " ",     # Words
             ""       # Characters
         ]
+        # Finer separators used to break up oversized pieces, by preference
+        self._split_separators = [s for s in self.separators if s and s != separator]
     
     def chunk_text(
         self,
@@ -66,7 +158,7 @@ class TextChunker:
             return []
         
         metadata = metadata or {}
-        chunks = self._recursive_chunk(text)
+        chunks = self._cached(text, self._recursive_chunk)
         
         # Create Chunk objects
         chunk_objects = []
@@ -86,6 +178,205 @@ class TextChunker:
         logger.debug(f"Created {len(chunk_objects)} chunks from text")
         return chunk_objects
     
+    def _cache_key(self, text: str, step: str) -> str:
+        """Content hash of ``text`` under the current chunking parameters."""
+        params = (
+            f"{type(self).__name__}:{step}:{self.chunk_size}:"
+            f"{self.chunk_overlap}:{self.separator!r}"
+        )
+        digest = hashlib.blake2b(params.encode(), digest_size=16)
+        digest.update(text.encode())
+        return digest.hexdigest()
+    
+    def _cache_file(self, text: str, step: str) -> Path:
+        """Path of the on-disk cache entry for ``step`` applied to ``text``."""
+        return Path(self.cache_dir, "chunks", f"{self._cache_key(text, step)}.pkl")
+    
+    def _prune_cache(self):
+        """Delete chunk cache files written more than cache_ttl seconds ago."""
+        cutoff = time.time() - self.cache_ttl
+        removed = 0
+        with os.scandir(Path(self.cache_dir, "chunks")) as entries:
+            for entry in entries:
+                try:
+                    if entry.name.endswith(".pkl") and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                except OSError:
+                    # Removed concurrently by another chunker; nothing to do
+                    pass
+        if removed:
+            logger.info(f"Removed {removed} expired chunk cache files")
+    
+    def _is_cached(self, text: str) -> bool:
+        """Whether chunk_text(text) would be served from the disk cache."""
+        return self.cache_dir is not None and self._cache_file(text, self._CACHED_STEP).exists()
+    
+    def _cached(self, text: str, compute: Callable[[str], Any]) -> Any:
+        """
+        Return ``compute(text)``, memoized on disk by content hash.
+        
+        Args:
+            text: Input text.
+            compute: Chunking step to run on a cache miss.
+            
+        Returns:
+            The (possibly cached) result of ``compute``.
+        """
+        if self.cache_dir is None:
+            return compute(text)
+        
+        cache_file = self._cache_file(text, compute.__name__)
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"Ignoring unreadable chunk cache {cache_file.name}: {e}")
+        
+        result = compute(text)
+        
+        # Write atomically so concurrent workers never see partial files
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_file)
+        except OSError as e:
+            logger.warning(f"Failed to write chunk cache: {e}")
+        
+        return result
+    
+    def chunk_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> List[List[Chunk]]:
+        """
+        Chunk several documents, fanning out to a process pool.
+        
+        Chunking is CPU-bound pure Python, so worker processes sidestep the
+        GIL. Small batches are chunked inline to avoid pool start-up cost.
+        
+        Args:
+            texts: Texts to chunk.
+            metadatas: Optional metadata for each text.
+            
+        Returns:
+            One list of Chunk objects per input text, in order.
+        """
+        return list(self.iter_chunk_texts(texts, metadatas))
+    
+    def iter_chunk_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[List[Chunk]]:
+        """
+        Like chunk_texts, but yield each document's chunks as soon as they
+        (and all earlier documents' chunks) are ready.
+        
+        Args:
+            texts: Texts to chunk.
+            metadatas: Optional metadata for each text.
+            
+        Yields:
+            One list of Chunk objects per input text, in order.
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        
+        # Documents already in the chunk cache are cheap to finish here; only
+        # the rest are worth shipping to workers (and a fully cached re-ingest
+        # never starts the pool)
+        pooled = [i for i, t in enumerate(texts) if t and not self._is_cached(t)]
+        
+        if (
+            self.max_workers <= 1
+            or len(pooled) < 2
+            or sum(len(texts[i]) for i in pooled) < self.POOL_MIN_CHARS
+        ):
+            for t, m in zip(texts, metadatas):
+                yield self.chunk_text(t, m)
+            return
+        
+        workers = min(self.max_workers, len(pooled))
+        chunksize = max(1, len(pooled) // (4 * workers))
+        done = 0
+        try:
+            # Spawned workers: forking would copy non-fork-safe state such as
+            # LanceDB's async runtime from the parent process
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results = executor.map(
+                    self.chunk_text,
+                    [texts[i] for i in pooled],
+                    [metadatas[i] for i in pooled],
+                    chunksize=chunksize
+                )
+                pooled_set = set(pooled)
+                for i, (t, m) in enumerate(zip(texts, metadatas)):
+                    yield next(results) if i in pooled_set else self.chunk_text(t, m)
+                    done += 1
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Process pool unavailable ({e}), chunking serially")
+            for t, m in zip(texts[done:], metadatas[done:]):
+                yield self.chunk_text(t, m)
+    
+    def iter_chunk_stream(
+        self,
+        texts: Iterable[str],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Iterator[List[Chunk]]:
+        """
+        Chunk a stream of texts (e.g. the windows of a large file) in worker
+        processes, yielding each text's chunks in order.
+        
+        Unlike iter_chunk_texts the input is consumed lazily: at most
+        2 x max_workers texts are in flight, so the stream is never read far
+        ahead of the consumer. The first POOL_MIN_CHARS characters are chunked
+        inline, so short streams never start the pool.
+        
+        Args:
+            texts: Texts to chunk.
+            metadata: Optional metadata attached to every chunk.
+            
+        Yields:
+            One list of Chunk objects per input text, in order.
+        """
+        source = iter(texts)
+        inline_chars = 0
+        for t in source:
+            yield self.chunk_text(t, metadata)
+            inline_chars += len(t)
+            if inline_chars >= self.POOL_MIN_CHARS and self.max_workers > 1:
+                break
+        else:
+            return
+        
+        pending = deque()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                for t in source:
+                    pending.append((t, executor.submit(self.chunk_text, t, metadata)))
+                    if len(pending) > 2 * self.max_workers:
+                        chunks = pending[0][1].result()
+                        pending.popleft()
+                        yield chunks
+                while pending:
+                    chunks = pending[0][1].result()
+                    pending.popleft()
+                    yield chunks
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Process pool unavailable ({e}), chunking serially")
+            for t in itertools.chain((t for t, _ in pending), source):
+                yield self.chunk_text(t, metadata)
+    
     def _recursive_chunk(self, text: str) -> List[str]:
         """
         Recursively chunk text using separators.
@@ -97,35 +388,36 @@ class TextChunker:
             List of text chunks.
         """
         chunks = []
-        current_chunk = ""
-        
-        # Try to split by the primary separator first
-        splits = text.split(self.separator)
+        sep_len = len(self.separator)
+        # Offsets of the chunk being built; the separators between its pieces
+        # are already in place in ``text``, so it is sliced out only on flush
+        chunk_start = chunk_end = 0
         
-        for split in splits:
+        # Walk the primary-separator splits as offsets rather than
+        # materializing every piece alongside the input
+        for start, end in _iter_split_spans(text, self.separator):
+            cur_len = chunk_end - chunk_start
             # If adding this split would exceed chunk size
-            if len(current_chunk) + len(split) + len(self.separator) > self.chunk_size:
+            if cur_len + (end - start) + sep_len > self.chunk_size:
                 # Save current chunk if it has content
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
+                if cur_len:
+                    chunks.append(text[chunk_start:chunk_end].strip())
+                chunk_start = chunk_end = start
                 
                 # If the split itself is too large, recursively chunk it
-                if len(split) > self.chunk_size:
-                    sub_chunks = self._split_large_text(split)
-                    chunks.extend(sub_chunks)
-                    current_chunk = ""
+                if end - start > self.chunk_size:
+                    chunks.extend(self._split_large_text(text, start, end))
                 else:
-                    current_chunk = split
+                    chunk_end = end
+            elif cur_len:
+                # Extend the current chunk over the separator and this split
+                chunk_end = end
             else:
-                # Add to current chunk
-                if current_chunk:
-                    current_chunk += self.separator + split
-                else:
-                    current_chunk = split
+                chunk_start, chunk_end = start, end
         
         # Don't forget the last chunk
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if chunk_end > chunk_start:
+            chunks.append(text[chunk_start:chunk_end].strip())
         
         # Apply overlap
         if self.chunk_overlap > 0:
@@ -133,42 +425,51 @@ class TextChunker:
         
         return chunks
     
-    def _split_large_text(self, text: str) -> List[str]:
+    def _split_large_text(
+        self,
+        text: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> List[str]:
         """
         Split text that's larger than chunk_size.
         
+        Makes a single forward pass over the text: each chunk is cut after the
+        last occurrence of the coarsest separator inside the next
+        ``chunk_size`` window (lines, then sentences, clauses, words), falling
+        back to a hard cut at the window edge. Separator scans use
+        ``str.rfind``, so no intermediate token lists are built.
+        
         Args:
-            text: Large text to split.
+            text: Text containing the large piece.
+            start: Offset where the piece starts.
+            end: Offset where the piece ends (defaults to the end of text).
             
         Returns:
             List of chunks.
         """
         chunks = []
+        if end is None:
+            end = len(text)
         
-        # Try different separators
-        for separator in self.separators[1:]:  # Skip the primary separator
-            if separator:
-                parts = text.split(separator)
-                current = ""
-                
-                for part in parts:
-                    if len(current) + len(part) + len(separator) <= self.chunk_size:
-                        current += (separator if current else "") + part
-                    else:
-                        if current:
-                            chunks.append(current)
-                        current = part
-                
-                if current:
-                    chunks.append(current)
-                
-                # If we successfully chunked, return
-                if all(len(c) <= self.chunk_size for c in chunks):
-                    return chunks
+        while end - start > self.chunk_size:
+            window_end = start + self.chunk_size
+            cut = window_end
+            for separator in self._split_separators:
+                idx = text.rfind(separator, start, window_end)
+                if idx > start:
+                    # Keep the separator (e.g. sentence punctuation) on the left
+                    cut = idx + len(separator)
+                    break
+            
+            chunk = text[start:cut].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = cut
         
-        # Last resort: split by character count
-        for i in range(0, len(text), self.chunk_size):
-            chunks.append(text[i:i + self.chunk_size])
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
         
         return chunks
     
@@ -185,29 +486,22 @@ class TextChunker:
         if len(chunks) <= 1:
             return chunks
         
-        overlapped_chunks = []
+        full = self.chunk_overlap
+        # Middle chunks borrow roughly half the overlap from each side
+        tail_len = (full + 1) // 2
+        head_len = full // 2
         
-        for i, chunk in enumerate(chunks):
-            if i == 0:
-                # First chunk: add overlap from next chunk
-                if i + 1 < len(chunks):
-                    next_chunk = chunks[i + 1]
-                    overlap = next_chunk[:self.chunk_overlap]
-                    overlapped_chunks.append(chunk + " " + overlap)
-                else:
-                    overlapped_chunks.append(chunk)
-            elif i == len(chunks) - 1:
-                # Last chunk: add overlap from previous chunk
-                prev_chunk = chunks[i - 1]
-                overlap = prev_chunk[-self.chunk_overlap:]
-                overlapped_chunks.append(overlap + " " + chunk)
-            else:
-                # Middle chunks: add overlap from both sides
-                prev_chunk = chunks[i - 1]
-                next_chunk = chunks[i + 1]
-                prev_overlap = prev_chunk[-self.chunk_overlap//2:]
-                next_overlap = next_chunk[:self.chunk_overlap//2]
-                overlapped_chunks.append(prev_overlap + " " + chunk + " " + next_overlap)
+        # Slice each neighbour once up front rather than per use
+        tails = [c[-tail_len:] for c in chunks]
+        heads = [c[:head_len] for c in chunks]
+        
+        # First and last chunks take the full overlap from their one neighbour
+        overlapped_chunks = [" ".join((chunks[0], chunks[1][:full]))]
+        for i in range(1, len(chunks) - 1):
+            overlapped_chunks.append(
+                " ".join((tails[i - 1], chunks[i], heads[i + 1]))
+            )
+        overlapped_chunks.append(" ".join((chunks[-2][-full:], chunks[-1])))
         
         return overlapped_chunks
 
@@ -215,6 +509,11 @@ class TextChunker:
 class MarkdownChunker(TextChunker):
     """Specialized chunker for Markdown documents."""
     
+    _CACHED_STEP: ClassVar[str] = "_split_sections"
+    
+    # Compiled once for all instances instead of per line
+    _HEADER_RE: ClassVar["re.Pattern[str]"] = re.compile(r'^(#{1,6})\s+(.*)$')
+    
     def chunk_text(
         self,
         text: str,
@@ -230,10 +529,47 @@ class MarkdownChunker(TextChunker):
         Returns:
             List of Chunk objects.
         """
+        if not text:
+            return []
+        
         metadata = metadata or {}
+        sections = self._cached(text, self._split_sections)
+        
+        # Convert sections to chunks
+        chunks = []
+        for i, section in enumerate(sections):
+            section_text = section['text']
+            section_metadata = {
+                **metadata,
+                'section_header': section['header'],
+                'section_level': section['level'],
+                'section_index': i
+            }
+            
+            # If section is too large, use parent chunking
+            if len(section_text) > self.chunk_size:
+                sub_chunks = super().chunk_text(section_text, section_metadata)
+                chunks.extend(sub_chunks)
+            else:
+                chunk = Chunk(
+                    text=section_text,
+                    metadata=section_metadata,
+                    chunk_id=len(chunks)
+                )
+                chunks.append(chunk)
         
-        # Split by headers while preserving them
-        header_pattern = r'^(#{1,6})\s+(.*)$'
+        return chunks
+    
+    def _split_sections(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Split markdown text into sections at headers.
+        
+        Args:
+            text: Markdown text.
+            
+        Returns:
+            List of dicts with 'header', 'level' and 'text' keys.
+        """
         lines = text.split('\n')
         
         sections = []
@@ -244,7 +580,8 @@ class MarkdownChunker(TextChunker):
         }
         
         for line in lines:
-            header_match = re.match(header_pattern, line)
+            # Most lines aren't headers; only run the regex on '#' lines
+            header_match = line.startswith('#') and self._HEADER_RE.match(line)
             
             if header_match:
                 # Save current section if it has content
@@ -266,27 +603,11 @@ class MarkdownChunker(TextChunker):
         if current_section['content']:
             sections.append(current_section)
         
-        # Convert sections to chunks
-        chunks = []
-        for i, section in enumerate(sections):
-            section_text = '\n'.join(section['content'])
-            section_metadata = {
-                **metadata,
-                'section_header': section['header'],
-                'section_level': section['level'],
-                'section_index': i
+        return [
+            {
+                'header': section['header'],
+                'level': section['level'],
+                'text': '\n'.join(section['content'])
             }
-            
-            # If section is too large, use parent chunking
-            if len(section_text) > self.chunk_size:
-                sub_chunks = super().chunk_text(section_text, section_metadata)
-                chunks.extend(sub_chunks)
-            else:
-                chunk = Chunk(
-                    text=section_text,
-                    metadata=section_metadata,
-                    chunk_id=len(chunks)
-                )
-                chunks.append(chunk)
-        
-        return chunks
+            for section in sections
+        ]
@@ -1,13 +1,17 @@
 """Interactive CLI for the RAG system."""
 
+import io
 import os
 import sys
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import logging
 from dotenv import load_dotenv
 
-from src.rag_pipeline import RAGPipeline
+if TYPE_CHECKING:
+    # Imported on first 'init': lancedb, pyarrow and numpy are slow to load
+    from src.rag_pipeline_local import LocalRAGPipeline
 
 # Load environment variables
 load_dotenv()
@@ -23,7 +27,8 @@ class RAGCLI:
     
     def __init__(self):
         """Initialize the CLI."""
-        self.rag: Optional[RAGPipeline] = None
+        self.rag: Optional["LocalRAGPipeline"] = None
+        self._warmup_started = False
         self.commands = {
             "help": self.show_help,
             "init": self.init_rag,
@@ -36,9 +41,15 @@ class RAGCLI:
             "exit": self.exit_cli,
             "quit": self.exit_cli,  # alias
         }
+        # Longer first words cannot be commands, so are never lowercased
+        self._max_command_len = max(map(len, self.commands))
     
     def run(self):
         """Run the interactive CLI."""
+        # Block-buffer stdout; input() and the streaming path flush explicitly
+        if isinstance(sys.stdout, io.TextIOWrapper):
+            sys.stdout.reconfigure(line_buffering=False)
+        
         print("="*60)
         print("🤖 RAG System Interactive CLI")
         print("="*60)
@@ -46,12 +57,8 @@ class RAGCLI:
         print("💡 You can also ask questions directly!")
         print()
         
-        # Auto-initialize if API keys are available
-        if os.getenv("ANTHROPIC_API_KEY") and os.getenv("OPENAI_API_KEY"):
-            self.init_rag()
-        else:
-            print("⚠️  API keys not found. Use 'init' to configure.")
-            print("   Required: ANTHROPIC_API_KEY and OPENAI_API_KEY")
+        # Auto-initialize (everything runs locally, no API keys needed)
+        self.init_rag()
         
         while True:
             try:
@@ -60,19 +67,15 @@ class RAGCLI:
                 if not user_input:
                     continue
                 
-                # Check if it's a command first
-                if user_input.lower() in self.commands:
-                    self.commands[user_input.lower()]("")
-                    continue
-                
-                # Check if it starts with a command
+                # Check if it starts with a command (only the first word is lowercased)
                 parts = user_input.split(maxsplit=1)
-                cmd = parts[0].lower()
+                cmd = parts[0].lower() if len(parts[0]) <= self._max_command_len else None
                 args = parts[1] if len(parts) > 1 else ""
                 
                 # Execute command if recognized
-                if cmd in self.commands:
-                    self.commands[cmd](args)
+                handler = self.commands.get(cmd)
+                if handler is not None:
+                    handler(args)
                 else:
                     # If no command recognized, treat as a natural language query
                     if self.rag:
@@ -114,35 +117,33 @@ class RAGCLI:
   > addfile documents/info.txt
   > query What is RAG?
         """
-        print(help_text)
+        sys.stdout.write(help_text + "\n")
+        sys.stdout.flush()
     
     def init_rag(self, args=""):
         """Initialize the RAG system."""
         try:
-            print("🔄 Initializing RAG system...")
+            print("🔄 Initializing RAG system...", flush=True)
             
-            # Check for API keys
-            if not os.getenv("ANTHROPIC_API_KEY"):
-                print("❌ ANTHROPIC_API_KEY not found in environment")
-                print("   Get it from: https://console.anthropic.com/")
-                return
-            if not os.getenv("OPENAI_API_KEY"):
-                print("❌ OPENAI_API_KEY not found in environment")
-                print("   Get it from: https://platform.openai.com/api-keys")
-                return
-            
-            self.rag = RAGPipeline(
-                model="claude-3-haiku-20240307",
-                collection_name="cli_collection"
-            )
+            from src.rag_pipeline_local import LocalRAGPipeline
+            self.rag = LocalRAGPipeline(collection_name="cli_collection", semantic_answers=True)
+            self._start_warmup()
             
             stats = self.rag.get_stats()
             print(f"✅ RAG system initialized!")
-            print(f"   Model: {stats['model']}")
+            print(f"   Model: {stats['llm_model']}")
             print(f"   Documents: {stats['total_documents']}")
             
         except Exception as e:
             print(f"❌ Failed to initialize: {e}")
+            print("   Make sure Ollama is running: ollama serve")
+    
+    def _start_warmup(self):
+        """Load the models in the background so the first query is fast."""
+        if self._warmup_started:
+            return
+        self._warmup_started = True
+        threading.Thread(target=self.rag.warmup, name="rag-warmup", daemon=True).start()
     
     def add_document(self, text: str):
         """Add a document to the knowledge base."""
@@ -155,7 +156,7 @@ class RAGCLI:
             return
         
         try:
-            chunks = self.rag.add_document(text, metadata={"source": "cli"})
+            chunks = self.rag.add_documents([text], metadatas=[{"source": "cli"}])
             print(f"✅ Added document ({chunks} chunks created)")
         except Exception as e:
             print(f"❌ Failed to add document: {e}")
@@ -176,13 +177,9 @@ class RAGCLI:
                 print(f"❌ File not found: {filepath}")
                 return
             
-            text = path.read_text(encoding='utf-8')
-            doc_type = "markdown" if path.suffix in ['.md', '.markdown'] else "text"
-            
-            chunks = self.rag.add_document(
-                text,
-                metadata={"source": "file", "filename": path.name},
-                document_type=doc_type
+            chunks = self.rag.add_file(
+                str(path),
+                metadata={"source": "file", "filename": path.name}
             )
             
             print(f"✅ Added {path.name} ({chunks} chunks created)")
@@ -190,8 +187,8 @@ class RAGCLI:
         except Exception as e:
             print(f"❌ Failed to add file: {e}")
     
-    def query(self, question: str):
-        """Query the knowledge base."""
+    def query(self, question: str, stream: bool = True):
+        """Query the knowledge base, streaming the answer by default."""
         if not self.rag:
             print("❌ RAG system not initialized. Use 'init' first.")
             return
@@ -201,23 +198,47 @@ class RAGCLI:
             return
         
         try:
-            print("🔍 Searching knowledge base...")
-            response = self.rag.query(question, top_k=3)
+            print("🔍 Searching knowledge base...", flush=True)
+            
+            # Print the answer as it is generated rather than all at the end
+            streamed = []
+            
+            def write_token(token: str):
+                if not streamed:
+                    sys.stdout.write(self._answer_header())
+                streamed.append(token)
+                sys.stdout.write(token)
+                sys.stdout.flush()
             
-            print("\n" + "="*60)
-            print("💬 Answer:")
-            print("="*60)
-            print(response.answer)
+            response = self.rag.query(
+                question, top_k=3, stream=stream, on_token=write_token
+            )
+            
+            # Write the rest of the answer block in one go
+            out = io.StringIO()
+            if streamed:
+                out.write("\n")
+            else:
+                out.write(self._answer_header())
+                out.write(response.answer + "\n")
             
             if response.sources:
-                print("\n📚 Sources:")
+                out.write("\n📚 Sources:\n")
                 for i, (source, score) in enumerate(response.sources, 1):
                     preview = source[:100] + "..." if len(source) > 100 else source
-                    print(f"  {i}. [{score:.2f}] {preview}")
+                    out.write(f"  {i}. [{score:.2f}] {preview}\n")
+            
+            sys.stdout.write(out.getvalue())
+            sys.stdout.flush()
                     
         except Exception as e:
             print(f"❌ Query failed: {e}")
     
+    def _answer_header(self) -> str:
+        """Banner shown above an answer."""
+        rule = "=" * 60
+        return f"\n{rule}\n💬 Answer:\n{rule}\n"
+    
     def show_stats(self, args=""):
         """Show system statistics."""
         if not self.rag:
@@ -225,10 +246,10 @@ class RAGCLI:
             return
         
         stats = self.rag.get_stats()
-        print("\n📊 System Statistics:")
-        print("-" * 30)
-        for key, value in stats.items():
-            print(f"  {key}: {value}")
+        lines = ["\n📊 System Statistics:", "-" * 30]
+        lines.extend(f"  {key}: {value}" for key, value in stats.items())
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
     
     def clear_kb(self, args=""):
         """Clear the knowledge base."""
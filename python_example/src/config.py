@@ -2,6 +2,7 @@
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -10,6 +11,14 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+
+@lru_cache(maxsize=None)
+def _ensure_dirs(*directories: Path):
+    """Create directories once per process (repeat calls are free)."""
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+
 @dataclass
 class Config:
     """Application configuration."""
@@ -30,8 +39,7 @@ class Config:
     
     def __post_init__(self):
         """Create necessary directories if they don't exist."""
-        for directory in [self.data_dir, self.models_dir, self.logs_dir]:
-            directory.mkdir(parents=True, exist_ok=True)
+        _ensure_dirs(self.data_dir, self.models_dir, self.logs_dir)
 
 
 # Global config instance
@@ -1,17 +1,34 @@
 """Local embeddings using Ollama - ZERO COST, runs on your machine."""
 
 import os
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 import numpy as np
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 import hashlib
+import itertools
 import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
 from pathlib import Path
 
+try:
+    from src.ollama_api import json_dumps, json_loads, ollama_models, ollama_version, session_headers
+except ImportError:
+    from ollama_api import json_dumps, json_loads, ollama_models, ollama_version, session_headers
+
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
 
 class OllamaEmbeddings:
     """Local embeddings using Ollama - completely free, runs on your hardware.
@@ -22,11 +39,38 @@ class OllamaEmbeddings:
     - mxbai-embed-large (1024 dim) - Best quality, slower
     """
     
+    # First Ollama release with the batched /api/embed endpoint
+    BATCH_MIN_VERSION = (0, 3, 0)
+    # Concurrent per-prompt requests when batching is unavailable
+    MAX_WORKERS = 8
+    # Batched requests in flight at once (Ollama serves OLLAMA_NUM_PARALLEL)
+    MAX_CONCURRENT_BATCHES = 4
+    # Approximate tokens (chars / 4) packed into one /api/embed request
+    MAX_BATCH_TOKENS = 16_384
+    # Attempts per request on connection errors/timeouts (backoff 0.5s, 1s, ...)
+    RETRY_ATTEMPTS = 3
+    # Supported storage precisions for the SQLite cache
+    CACHE_DTYPES = ("float32", "float16", "int8")
+    # Seconds before a cached vector is recomputed (guards against model drift)
+    CACHE_TTL = 30 * 24 * 3600
+    # Keys per SELECT when looking up a batch (below SQLite's variable limit)
+    CACHE_LOOKUP_CHUNK = 500
+    # Query embeddings kept in memory, least recently used evicted first
+    MEM_CACHE_SIZE = 1024
+    # Seconds to wait for an embedding request (a cold model load is slow)
+    REQUEST_TIMEOUT = 60
+    # Dimension of the zero vector returned when generation fails
+    FALLBACK_DIM = 768  # nomic-embed-text dimension
+    
     def __init__(
         self,
         model: str = "nomic-embed-text:latest",
         base_url: str = "http://localhost:11434",
-        cache_dir: Optional[str] = None
+        cache_dir: Optional[str] = None,
+        batch_size: int = 64,
+        legacy_cache: bool = False,
+        cache_dtype: str = "float16",
+        cache_ttl: Optional[float] = CACHE_TTL
     ):
         """
         Initialize Ollama embeddings.
@@ -35,15 +79,58 @@ class OllamaEmbeddings:
             model: Ollama model to use for embeddings.
             base_url: Ollama API base URL.
             cache_dir: Directory to cache embeddings (saves recomputation).
+            batch_size: Maximum texts sent per batched /api/embed request
+                (requests are also capped at MAX_BATCH_TOKENS).
+            legacy_cache: Use the old one-JSON-file-per-embedding cache instead
+                of the single SQLite store (for migrating existing caches).
+            cache_dtype: Storage precision for cached vectors: "float32",
+                "float16" (half the size) or "int8" (per-vector scale, a
+                quarter of the size). Cosine ranking is unaffected in practice.
+            cache_ttl: Seconds a cached vector stays valid in the SQLite
+                store (None keeps entries forever). Entries tagged under a
+                different model tag never collide, but a re-pulled model with
+                the same tag would otherwise be served stale vectors.
         """
+        if cache_dtype not in self.CACHE_DTYPES:
+            raise ValueError(f"cache_dtype must be one of {self.CACHE_DTYPES}")
         self.model = model
         self.base_url = base_url
+        self.batch_size = batch_size
+        # Hasher pre-fed with the model prefix; copied for each cache key
+        self._key_hasher = hashlib.blake2b(f"{model}:".encode(), digest_size=16)
+        # Whether the server supports /api/embed (None = unknown, try it)
+        self._batch_supported: Optional[bool] = None
+        
+        # Keep-alive connections shared by all requests, sized so concurrent
+        # batches (each possibly fanning out per text) never open extra sockets
+        self._session = requests.Session()
+        self._session.mount(
+            "http://",
+            HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=self.MAX_WORKERS * self.MAX_CONCURRENT_BATCHES
+            )
+        )
+        self._session.headers.update(session_headers(base_url))
         
         # Set up caching to avoid recomputing embeddings
         if cache_dir is None:
             cache_dir = str(Path(__file__).parent.parent / "data" / "embedding_cache")
         Path(cache_dir).mkdir(parents=True, exist_ok=True)
         self.cache_dir = cache_dir
+        self.legacy_cache = legacy_cache
+        self.cache_dtype = cache_dtype
+        self.cache_ttl = cache_ttl
+        if not legacy_cache:
+            self._open_cache_db()
+        
+        # In-process LRU in front of the disk cache for repeated queries
+        self._mem_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._mem_lock = threading.Lock()
+        self._mem_hits = 0
+        self._mem_misses = 0
+        # Embedding dimension, learned from the first vector seen
+        self._dim: Optional[int] = None
         
         # Test connection
         self._test_connection()
@@ -51,43 +138,262 @@ class OllamaEmbeddings:
         logger.info(f"Initialized Ollama embeddings with model: {model}")
     
     def _test_connection(self):
-        """Test if Ollama is running and model is available."""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code != 200:
-                raise ConnectionError(f"Ollama not responding at {self.base_url}")
-            
-            models = response.json().get("models", [])
-            model_names = [m["name"] for m in models]
-            
-            if self.model not in model_names:
-                logger.warning(f"Model {self.model} not found. Available models: {model_names}")
-                logger.info(f"Pull the model with: ollama pull {self.model}")
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError(
-                "Ollama is not running. Start it with: ollama serve\n"
-                "Install from: https://ollama.ai"
+        """Test if Ollama is running and model is available (memoized per server)."""
+        model_names = list(ollama_models(self.base_url))
+        if self.model not in model_names:
+            logger.warning(f"Model {self.model} not found. Available models: {model_names}")
+            logger.info(f"Pull the model with: ollama pull {self.model}")
+        
+        self._batch_supported = self._check_batch_support()
+    
+    def _check_batch_support(self) -> Optional[bool]:
+        """Check whether the server is new enough for batched /api/embed."""
+        version = ollama_version(self.base_url)
+        if version is None:
+            # Unknown version; try the batch endpoint and fall back on 404
+            return None
+        return version >= self.BATCH_MIN_VERSION
+    
+    def _open_cache_db(self):
+        """Open the SQLite embedding cache (one file instead of one per vector)."""
+        self._cache_lock = threading.Lock()
+        self._cache_db = sqlite3.connect(
+            str(Path(self.cache_dir) / "embeddings.sqlite3"),
+            check_same_thread=False
+        )
+        self._cache_db.execute("PRAGMA journal_mode=WAL")
+        self._cache_db.execute("PRAGMA synchronous=NORMAL")
+        self._cache_db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key BLOB PRIMARY KEY, dtype TEXT NOT NULL, vector BLOB NOT NULL, "
+            "created REAL)"
+        )
+        columns = [row[1] for row in self._cache_db.execute("PRAGMA table_info(embeddings)")]
+        if "created" not in columns:
+            # Caches written before expiry existed start their clock now
+            self._cache_db.execute("ALTER TABLE embeddings ADD COLUMN created REAL")
+            self._cache_db.execute("UPDATE embeddings SET created = ?", (time.time(),))
+        if self.cache_ttl is not None:
+            self._cache_db.execute(
+                "DELETE FROM embeddings WHERE created < ?", (time.time() - self.cache_ttl,)
             )
+        self._cache_db.commit()
+    
+    @staticmethod
+    def _encode_vector(embedding: List[float], dtype: str) -> bytes:
+        """Pack an embedding into bytes at the given storage precision."""
+        arr = np.asarray(embedding, dtype=np.float32)
+        if dtype == "int8":
+            # Symmetric per-vector quantization; the float32 scale is a prefix
+            scale = float(np.abs(arr).max()) / 127 or 1.0
+            quantized = np.round(arr / scale).astype(np.int8)
+            return np.float32(scale).tobytes() + quantized.tobytes()
+        return arr.astype(dtype).tobytes()
+    
+    @staticmethod
+    def _decode_vector(blob: bytes, dtype: str) -> np.ndarray:
+        """Unpack bytes written by ``_encode_vector`` into a float32 array."""
+        if dtype == "int8":
+            scale = np.frombuffer(blob, dtype=np.float32, count=1)[0]
+            quantized = np.frombuffer(blob, dtype=np.int8, offset=4)
+            return quantized.astype(np.float32) * scale
+        return np.frombuffer(blob, dtype=dtype).astype(np.float32)
+    
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """
+        Canonical form of text for cache lookups.
+        
+        Intentionally lossy: inputs differing only in Unicode form, case or
+        whitespace ("  Hello " vs "hello") share one cache entry, so the
+        cached vector may come from a differently formatted variant.
+        """
+        text = unicodedata.normalize("NFKC", text)
+        return _WHITESPACE_RE.sub(" ", text).strip().lower()
     
-    def _get_cache_key(self, text: str) -> str:
-        """Generate cache key for text."""
-        return hashlib.md5(f"{self.model}:{text}".encode()).hexdigest()
+    def _get_cache_key(self, text: str) -> bytes:
+        """Generate cache key for normalized text (raw digest bytes)."""
+        if self.legacy_cache:
+            # The old JSON files are named md5("model:text") over the raw text
+            return hashlib.md5(f"{self.model}:{text}".encode()).digest()
+        hasher = self._key_hasher.copy()
+        hasher.update(self._normalize(text).encode())
+        return hasher.digest()
     
-    def _load_from_cache(self, cache_key: str) -> Optional[List[float]]:
+    def _load_from_cache(self, cache_key: bytes) -> Optional[np.ndarray]:
         """Load embedding from cache if exists."""
-        cache_file = Path(self.cache_dir) / f"{cache_key}.json"
-        if cache_file.exists():
-            with open(cache_file, 'r') as f:
-                return json.load(f)
-        return None
+        return self._load_many_from_cache([cache_key]).get(cache_key)
     
-    def _save_to_cache(self, cache_key: str, embedding: List[float]):
+    def _load_many_from_cache(self, cache_keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up several embeddings at once; returns only the keys found."""
+        found: Dict[bytes, np.ndarray] = {}
+        if self.legacy_cache:
+            for cache_key in cache_keys:
+                cache_file = Path(self.cache_dir) / f"{cache_key.hex()}.json"
+                if cache_file.exists():
+                    with open(cache_file, 'r') as f:
+                        found[cache_key] = np.asarray(json.load(f), dtype=np.float32)
+            return found
+        
+        min_created = -math.inf if self.cache_ttl is None else time.time() - self.cache_ttl
+        unique_keys = list(dict.fromkeys(cache_keys))
+        with self._cache_lock:
+            for start in range(0, len(unique_keys), self.CACHE_LOOKUP_CHUNK):
+                chunk = unique_keys[start:start + self.CACHE_LOOKUP_CHUNK]
+                rows = self._cache_db.execute(
+                    "SELECT key, dtype, vector FROM embeddings "
+                    f"WHERE key IN ({','.join('?' * len(chunk))}) AND created >= ?",
+                    (*chunk, min_created)
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = self._decode_vector(blob, dtype)
+        return found
+    
+    def _save_to_cache(self, cache_key: bytes, embedding: List[float]):
         """Save embedding to cache."""
-        cache_file = Path(self.cache_dir) / f"{cache_key}.json"
-        with open(cache_file, 'w') as f:
-            json.dump(embedding, f)
+        self._save_many_to_cache([(cache_key, embedding)])
+    
+    def _save_many_to_cache(self, items: List[Tuple[bytes, List[float]]]):
+        """Save several embeddings to cache in one transaction."""
+        if self.legacy_cache:
+            for cache_key, embedding in items:
+                cache_file = Path(self.cache_dir) / f"{cache_key.hex()}.json"
+                with open(cache_file, 'w') as f:
+                    json.dump(np.asarray(embedding, dtype=np.float32).tolist(), f)
+            return
+        
+        now = time.time()
+        rows = [
+            (key, self.cache_dtype, self._encode_vector(embedding, self.cache_dtype), now)
+            for key, embedding in items
+        ]
+        with self._cache_lock, self._cache_db:
+            self._cache_db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dtype, vector, created) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+    
+    def _post(self, path: str, payload: dict) -> requests.Response:
+        """
+        POST JSON to the server, retrying transient transport failures.
+        
+        HTTP error statuses are returned, not retried. A plain loop rather than
+        a retry decorator: the success path costs one try block.
+        """
+        for attempt in range(self.RETRY_ATTEMPTS):
+            try:
+                return self._session.post(
+                    f"{self.base_url}{path}",
+                    data=json_dumps(payload),
+                    timeout=self.REQUEST_TIMEOUT
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.RETRY_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+    
+    def _embed_batch(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """
+        Embed several texts with one /api/embed request.
+        
+        Returns:
+            The embeddings, or None if the server has no batch endpoint
+            (404, or a reply without an "embeddings" field).
+        """
+        response = self._post("/api/embed", {
+            "model": self.model,
+            "input": texts
+        })
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise RuntimeError(response.text)
+        return json_loads(response.content).get("embeddings")
+    
+    def _embed_one(self, text: str) -> Optional[List[float]]:
+        """Embed a single text with the per-prompt /api/embeddings endpoint."""
+        try:
+            response = self._post("/api/embeddings", {
+                "model": self.model,
+                "prompt": text
+            })
+            
+            if response.status_code == 200:
+                return json_loads(response.content)["embedding"]
+            logger.error(f"Failed to generate embedding: {response.text}")
+        except Exception as e:
+            logger.error(f"Error generating embedding: {e}")
+        return None
+    
+    def _pack(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """
+        Split texts into [start, end) request ranges.
+        
+        Each range holds at most batch_size texts and about MAX_BATCH_TOKENS
+        tokens (estimated as characters / 4), so short texts share fewer,
+        fuller requests and long ones don't overload a single request.
+        """
+        ranges = []
+        start = tokens = 0
+        for i, text in enumerate(texts):
+            cost = len(text) // 4 + 1
+            if i > start and (
+                i - start >= self.batch_size or tokens + cost > self.MAX_BATCH_TOKENS
+            ):
+                ranges.append((start, i))
+                start, tokens = i, 0
+            tokens += cost
+        if start < len(texts):
+            ranges.append((start, len(texts)))
+        return ranges
+    
+    def _embed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed texts, batching when the server supports it.
+        
+        Returns:
+            One embedding per text, None where generation failed.
+        """
+        if self._batch_supported is not False:
+            try:
+                batch = self._embed_batch(texts)
+                if batch is not None and len(batch) == len(texts):
+                    self._batch_supported = True
+                    return batch
+                if batch is not None:
+                    # Never guess which inputs the missing vectors belong to
+                    logger.warning(
+                        f"/api/embed returned {len(batch)} embeddings for {len(texts)} "
+                        "texts, embedding them one at a time"
+                    )
+                    return self._embed_each(texts)
+                logger.info("Ollama has no /api/embed endpoint, embedding one text at a time")
+                self._batch_supported = False
+            except RuntimeError as e:
+                # The server rejected the request; a smaller one may fit
+                if len(texts) > 1:
+                    logger.warning(f"Batch of {len(texts)} rejected ({e}), retrying in halves")
+                    mid = len(texts) // 2
+                    return self._embed_texts(texts[:mid]) + self._embed_texts(texts[mid:])
+                logger.error(f"Error generating embeddings: {e}")
+                return [None]
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {e}")
+                return [None] * len(texts)
+        
+        return self._embed_each(texts)
+    
+    def _embed_each(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts with one /api/embeddings request each."""
+        if len(texts) == 1:
+            return [self._embed_one(texts[0])]
+        
+        # Requests are I/O-bound, so overlap them; map() preserves order
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(texts))) as executor:
+            return list(executor.map(self._embed_one, texts))
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
         """
         Embed a list of documents with caching and batching.
         
@@ -95,60 +401,90 @@ class OllamaEmbeddings:
             texts: List of text documents to embed.
             
         Returns:
-            List of embedding vectors.
+            Contiguous float32 array of shape (len(texts), dim).
         """
         if not texts:
-            return []
+            return np.empty((0, self._dim or self.FALLBACK_DIM), dtype=np.float32)
         
-        embeddings = []
+        # Rows are filled in place once the dimension is known; rows whose
+        # embedding failed stay zero
+        embeddings: Optional[np.ndarray] = None
         uncached_texts = []
         uncached_indices = []
+        # Later rows whose text normalizes like an earlier uncached one:
+        # (row, row it is copied from once that one is embedded)
+        duplicates: List[Tuple[int, int]] = []
+        cache_keys = [self._get_cache_key(text) for text in texts]
         
-        # Check cache first
-        for i, text in enumerate(texts):
-            cache_key = self._get_cache_key(text)
-            cached = self._load_from_cache(cache_key)
-            if cached:
-                embeddings.append(cached)
+        def store(idx: int, vector: np.ndarray):
+            nonlocal embeddings
+            if embeddings is None:
+                self._dim = vector.shape[0]
+                embeddings = np.zeros((len(texts), self._dim), dtype=np.float32)
+            embeddings[idx] = vector
+        
+        # Check cache first (one lookup for the whole list)
+        cached_vectors = self._load_many_from_cache(cache_keys)
+        first_uncached = {}
+        for i, (text, cache_key) in enumerate(zip(texts, cache_keys)):
+            cached = cached_vectors.get(cache_key)
+            if cached is not None and cached.size:
+                store(i, cached)
+            elif cache_key in first_uncached:
+                # Repeated text (e.g. boilerplate) is embedded only once
+                duplicates.append((i, first_uncached[cache_key]))
             else:
-                embeddings.append(None)  # Placeholder
+                first_uncached[cache_key] = i
                 uncached_texts.append(text)
                 uncached_indices.append(i)
         
         # Generate embeddings for uncached texts
         if uncached_texts:
-            logger.info(f"Generating {len(uncached_texts)} embeddings (cached: {len(texts) - len(uncached_texts)})")
+            logger.info(
+                f"Generating {len(uncached_texts)} embeddings "
+                f"(cached: {len(texts) - len(uncached_texts) - len(duplicates)}, "
+                f"duplicates: {len(duplicates)})"
+            )
             
-            for text, idx in zip(uncached_texts, uncached_indices):
-                try:
-                    response = requests.post(
-                        f"{self.base_url}/api/embeddings",
-                        json={
-                            "model": self.model,
-                            "prompt": text
-                        }
-                    )
+            batch_ranges = self._pack(uncached_texts)
+            
+            def embed_batch(bounds: Tuple[int, int]) -> List[Optional[List[float]]]:
+                return self._embed_texts(uncached_texts[bounds[0]:bounds[1]])
+            
+            with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_BATCHES) as executor:
+                # Batches overlap their round-trips; map() preserves order.
+                # While endpoint support is unknown the first batch runs
+                # alone to settle it, so the others don't all probe too.
+                probe = 1 if self._batch_supported is None else 0
+                results = itertools.chain(
+                    [embed_batch(bounds) for bounds in batch_ranges[:probe]],
+                    executor.map(embed_batch, batch_ranges[probe:])
+                )
+                for (start, end), batch in zip(batch_ranges, results):
+                    batch_indices = uncached_indices[start:end]
+                    to_cache = []
                     
-                    if response.status_code == 200:
-                        embedding = response.json()["embedding"]
-                        embeddings[idx] = embedding
-                        
-                        # Cache the result
-                        cache_key = self._get_cache_key(text)
-                        self._save_to_cache(cache_key, embedding)
-                    else:
-                        logger.error(f"Failed to generate embedding: {response.text}")
-                        # Fallback to zero embedding with correct dimension
-                        embeddings[idx] = [0.0] * 768  # nomic-embed-text dimension
+                    for idx, embedding in zip(batch_indices, batch):
+                        if embedding is None:
+                            continue
                         
-                except Exception as e:
-                    logger.error(f"Error generating embedding: {e}")
-                    embeddings[idx] = [0.0] * 768  # nomic-embed-text dimension
+                        store(idx, np.asarray(embedding, dtype=np.float32))
+                        to_cache.append((cache_keys[idx], embeddings[idx]))
+                    
+                    # Cache the results
+                    self._save_many_to_cache(to_cache)
+        
+        if embeddings is None:
+            # Nothing was embedded: zero embeddings with the known dimension
+            embeddings = np.zeros((len(texts), self._dim or self.FALLBACK_DIM), dtype=np.float32)
+        if duplicates:
+            rows, sources = zip(*duplicates)
+            embeddings[list(rows)] = embeddings[list(sources)]
         
         logger.debug(f"Generated {len(embeddings)} embeddings")
         return embeddings
     
-    def embed_query(self, query: str) -> List[float]:
+    def embed_query(self, query: str) -> np.ndarray:
         """
         Embed a search query with caching.
         
@@ -156,38 +492,112 @@ class OllamaEmbeddings:
             query: Query text to embed.
             
         Returns:
-            Embedding vector for the query.
+            Float32 embedding vector for the query.
         """
-        # Check cache
         cache_key = self._get_cache_key(query)
+        
+        # Check the in-memory cache, then the disk cache
+        cached = self._mem_get(cache_key)
+        if cached is not None:
+            return cached.copy()
         cached = self._load_from_cache(cache_key)
-        if cached:
+        if cached is not None and cached.size:
             logger.debug(f"Using cached embedding for query")
+            self._mem_put(cache_key, cached)
             return cached
         
         logger.debug(f"Embedding query: {query[:100]}...")
         
-        try:
-            response = requests.post(
-                f"{self.base_url}/api/embeddings",
-                json={
-                    "model": self.model,
-                    "prompt": query
-                }
-            )
+        embedding = self._embed_texts([query])[0]
+        if embedding is None:
+            return np.zeros(self._dim or self.FALLBACK_DIM, dtype=np.float32)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self._dim = embedding.shape[0]
+        
+        # Cache the result
+        self._save_to_cache(cache_key, embedding)
+        self._mem_put(cache_key, embedding)
+        return embedding
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed several search queries, sharing embed_query's in-memory cache.
+        
+        Queries missing from the in-memory LRU are embedded together by
+        embed_documents (disk cache, batched requests) and then remembered,
+        so a later embed_query for any of them is a memory hit.
+        
+        Args:
+            queries: Query texts to embed.
             
-            if response.status_code == 200:
-                embedding = response.json()["embedding"]
-                # Cache the result
-                self._save_to_cache(cache_key, embedding)
-                return embedding
-            else:
-                logger.error(f"Failed to generate query embedding: {response.text}")
-                return [0.0] * 768  # nomic-embed-text dimension
-                
-        except Exception as e:
-            logger.error(f"Error generating query embedding: {e}")
-            return [0.0] * 768  # nomic-embed-text dimension
+        Returns:
+            Contiguous float32 array of shape (len(queries), dim).
+        """
+        cache_keys = [self._get_cache_key(query) for query in queries]
+        rows = [self._mem_get(cache_key) for cache_key in cache_keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            embedded = self.embed_documents([queries[i] for i in missing])
+            for i, embedding in zip(missing, embedded):
+                rows[i] = embedding
+                if embedding.any():
+                    self._mem_put(cache_keys[i], embedding)
+        if not rows:
+            return np.empty((0, self._dim or self.FALLBACK_DIM), dtype=np.float32)
+        return np.stack(rows)
+    
+    def close(self):
+        """Close pooled connections and the cache database."""
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+        cache_db = getattr(self, "_cache_db", None)
+        if cache_db is not None:
+            cache_db.close()
+            self._cache_db = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __del__(self):
+        self.close()
+    
+    def _mem_get(self, cache_key: bytes) -> Optional[np.ndarray]:
+        """Look up a query embedding in the in-memory LRU."""
+        with self._mem_lock:
+            embedding = self._mem_cache.get(cache_key)
+            if embedding is None:
+                self._mem_misses += 1
+                return None
+            self._mem_cache.move_to_end(cache_key)
+            self._mem_hits += 1
+            return embedding
+    
+    def _mem_put(self, cache_key: bytes, embedding: np.ndarray):
+        """Store a query embedding in the in-memory LRU."""
+        with self._mem_lock:
+            self._mem_cache[cache_key] = embedding.copy()
+            self._mem_cache.move_to_end(cache_key)
+            if len(self._mem_cache) > self.MEM_CACHE_SIZE:
+                self._mem_cache.popitem(last=False)
+    
+    def cache_stats(self) -> dict:
+        """
+        Get hit/miss counts for the in-memory query cache.
+        
+        Returns:
+            Dictionary with hits, misses, current size and maxsize.
+        """
+        with self._mem_lock:
+            return {
+                "hits": self._mem_hits,
+                "misses": self._mem_misses,
+                "size": len(self._mem_cache),
+                "maxsize": self.MEM_CACHE_SIZE,
+            }
 
 
 class SentenceTransformerEmbeddings:
@@ -196,12 +606,19 @@ class SentenceTransformerEmbeddings:
     This is even simpler - pure Python, no external services.
     """
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        device: Optional[str] = None,
+        batch_size: int = 64
+    ):
         """
         Initialize sentence-transformer embeddings.
         
         Args:
             model_name: HuggingFace model name.
+            device: Torch device; defaults to "cuda" when available, else "cpu".
+            batch_size: Texts encoded per forward pass.
         """
         try:
             from sentence_transformers import SentenceTransformer
@@ -211,16 +628,141 @@ class SentenceTransformerEmbeddings:
                 "pip install sentence-transformers"
             )
         
-        self.model = SentenceTransformer(model_name)
+        if device is None:
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        self.model = SentenceTransformer(model_name, device=device)
+        if device.startswith("cuda"):
+            # Half precision doubles throughput on GPU tensor cores
+            self.model.half()
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        logger.info(f"Loaded sentence-transformer model: {model_name} on {device}")
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in batches to unit-length float32 vectors."""
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        # FP16 models return float16; hand out one contiguous float32 block
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed documents as an (n, dim) float32 array (one row per text)."""
+        return self._encode(texts)
+    
+    def embed_documents_list(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents as nested lists, for callers that need plain lists."""
+        return self._encode(texts).tolist()
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed query as a (dim,) float32 array."""
+        return self._encode([query])[0]
+
+
+class OnnxEmbeddings:
+    """Alternative: sentence-transformer model exported to ONNX and quantized to INT8.
+    
+    Runs on onnxruntime's CPU provider with dynamic INT8 quantization
+    (AVX-512 VNNI kernels where the CPU has them) - typically 2-5x faster
+    than the PyTorch model on CPU at ~1% quality loss. The exported model is
+    cached on disk, so the conversion only happens once per model.
+    """
+    
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache_dir: Optional[str] = None,
+        batch_size: int = 64,
+        quantize: bool = True
+    ):
+        """
+        Initialize ONNX embeddings.
+        
+        Args:
+            model_name: HuggingFace model name.
+            cache_dir: Directory for exported ONNX models.
+            batch_size: Texts encoded per forward pass.
+            quantize: Quantize the exported model to INT8.
+        """
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise ImportError(
+                "optimum[onnxruntime] not installed. Run:\n"
+                "pip install \"optimum[onnxruntime]\""
+            )
+        
+        if cache_dir is None:
+            cache_dir = str(Path(__file__).parent.parent / "data" / "onnx_models")
+        save_dir = Path(cache_dir) / model_name.replace("/", "__")
+        file_name = "model_quantized.onnx" if quantize else "model.onnx"
+        
+        # Export (and quantize) once; later runs load straight from disk
+        if not (save_dir / file_name).exists():
+            logger.info(f"Exporting {model_name} to ONNX (one-time)...")
+            model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+            model.save_pretrained(save_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(save_dir)
+            if quantize:
+                quantizer = ORTQuantizer.from_pretrained(model)
+                qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+                quantizer.quantize(save_dir=save_dir, quantization_config=qconfig)
+        
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = os.cpu_count() or 1
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            save_dir,
+            file_name=file_name,
+            provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(save_dir)
         self.model_name = model_name
-        logger.info(f"Loaded sentence-transformer model: {model_name}")
+        self.batch_size = batch_size
+        logger.info(f"Loaded ONNX embedding model: {model_name} ({file_name})")
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in batches to unit-length float32 vectors (mean pooling)."""
+        out: Optional[np.ndarray] = None
+        # Batch texts of similar length together so little compute goes to padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for i in range(0, len(order), self.batch_size):
+            rows = order[i:i + self.batch_size]
+            inputs = self.tokenizer(
+                [texts[j] for j in rows],
+                padding=True,
+                truncation=True,
+                return_tensors="np"
+            )
+            hidden = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+            mask = inputs["attention_mask"].astype(np.float32)
+            # Masked sum over tokens without a (batch, tokens, dim) temporary
+            pooled = np.einsum("ijk,ij->ik", hidden, mask)
+            pooled /= np.maximum(mask.sum(axis=1, keepdims=True), 1e-9)
+            pooled /= np.linalg.norm(pooled, axis=1, keepdims=True).clip(1e-12)
+            if out is None:
+                out = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            out[rows] = pooled
+        return out
+    
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed documents as an (n, dim) float32 array (one row per text)."""
+        return self._encode(texts)
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed documents."""
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+    def embed_documents_list(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents as nested lists, for callers that need plain lists."""
+        return self._encode(texts).tolist()
     
-    def embed_query(self, query: str) -> List[float]:
-        """Embed query."""
-        embedding = self.model.encode([query], convert_to_numpy=True)[0]
-        return embedding.tolist()
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embed query as a (dim,) float32 array."""
+        return self._encode([query])[0]
@@ -5,7 +5,7 @@ from pathlib import Path
 import logging
 from dotenv import load_dotenv
 
-from src.rag_pipeline import RAGPipeline
+from src.rag_pipeline_local import LocalRAGPipeline
 
 # Load environment variables
 load_dotenv()
@@ -23,11 +23,10 @@ def main():
     
     # Initialize RAG pipeline
     logger.info("Initializing RAG pipeline...")
-    rag = RAGPipeline(
-        model="claude-3-haiku-20240307",  # Fast and cost-effective
-            chunk_size=512, # 512 is the default
-            chunk_overlap=100 # 50 is the default
-        )
+    rag = LocalRAGPipeline(
+        chunk_size=512,  # 512 is the default
+        chunk_overlap=100  # 50 is the default
+    )
     
     # Clear any existing data (for demo purposes)
     rag.clear_knowledge_base()
@@ -141,25 +140,35 @@ def main():
         "Explain the process of how RAG works step by step."
     ]
     
-    # Process each query
-    for query in queries:
+    # Answer all queries together: one embedding call, parallel searches
+    # and concurrent generation. top_k is the number of chunks to retrieve
+    print("Getting responses...")
+    responses = rag.batch_query(queries, top_k=3)
+    print("Responses received.")
+    
+    for query, response in zip(queries, responses):
         print("\n" + "="*80)
         print(f"QUERY: {query}")
         print("="*80)
         
-        # Get response
-        print("Getting response...")
-        # top_k is the number of chunks to retrieve
-        response = rag.query(query, top_k=3)
-        print("Response received.")
-        
-        print("Printing answer...")
         print(f"\nANSWER:\n{response.answer}")
         
         print(f"\nSOURCES (Top {len(response.sources)}):")
         for i, (source, score) in enumerate(response.sources, 1):
             print(f"{i}. [Score: {score:.3f}] {source}")
-    
+
+    # Stream a follow-up answer: text is printed as the model generates it
+    follow_up = "How do neural networks relate to deep learning?"
+    print("\n" + "="*80)
+    print(f"QUERY (streamed): {follow_up}")
+    print("="*80)
+    print("\nANSWER:")
+    for piece in rag.query_stream(follow_up, top_k=3):
+        if isinstance(piece, str):
+            print(piece, end="", flush=True)
+        else:
+            print(f"\n\n({piece.time_taken:.2f}s, {len(piece.sources)} sources)")
+
     # Print statistics
     print("\n" + "="*80)
     print("RAG SYSTEM STATISTICS")
@@ -1,11 +1,22 @@
 """Local LLM using Ollama - ZERO COST alternative to Claude/GPT."""
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterator, List, Dict, Any, Optional, Union
 import requests
+from requests.adapters import HTTPAdapter
 import logging
+import time
 from dataclasses import dataclass
-import json
+
+try:
+    from llama_cpp import Llama
+except ImportError:
+    Llama = None
+
+try:
+    from src.ollama_api import json_dumps, json_loads, ollama_models, session_headers
+except ImportError:
+    from ollama_api import json_dumps, json_loads, ollama_models, session_headers
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +43,28 @@ class OllamaLLM:
     6. deepseek-coder:6.7b - For code-heavy RAG
     """
     
+    # Keep-alive connections kept open to the Ollama server
+    POOL_SIZE = 16
+    # Attempts per request on connection errors or a busy server (503);
+    # backoff 0.5s, 1s, ...
+    RETRY_ATTEMPTS = 3
+    
+    # Default RAG instructions. The prompt is laid out constant part first
+    # (system prompt, instructions, then context, then the question) and the
+    # constant part is byte-identical across calls, so Ollama can reuse the
+    # KV cache of that prefix instead of re-evaluating it for every query.
+    DEFAULT_SYSTEM_PROMPT = (
+        "You are a helpful AI assistant with access to a document knowledge base. "
+        "Use the provided context to answer questions accurately. "
+        "If the context doesn't contain relevant information, say so clearly."
+    )
+    CONTEXT_PROMPT_HEAD = (
+        "Please provide a comprehensive answer based on the context provided. "
+        "If the context doesn't contain enough information, acknowledge this "
+        "limitation.\n\nContext:\n"
+    )
+    CONTEXT_PROMPT_TAIL = "\n\nQuestion: "
+    
     def __init__(
         self,
         model: str = "tinyllama:latest",
@@ -53,29 +86,25 @@ class OllamaLLM:
         self.temperature = temperature
         self.max_tokens = max_tokens
         
+        # Reuse one keep-alive connection pool instead of a new socket per call
+        self._session = requests.Session()
+        self._session.mount(
+            "http://",
+            HTTPAdapter(pool_connections=self.POOL_SIZE, pool_maxsize=self.POOL_SIZE)
+        )
+        self._session.headers.update(session_headers(base_url))
+        
         # Test connection
         self._test_connection()
         
         logger.info(f"Initialized Ollama LLM with model: {model}")
     
     def _test_connection(self):
-        """Test if Ollama is running and model is available."""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code != 200:
-                raise ConnectionError(f"Ollama not responding at {self.base_url}")
-            
-            models = response.json().get("models", [])
-            model_names = [m["name"] for m in models]
-            
-            if not any(self.model.startswith(m["name"].split(":")[0]) for m in models):
-                logger.warning(f"Model {self.model} not found. Available models: {model_names}")
-                logger.info(f"Pull the model with: ollama pull {self.model}")
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError(
-                "Ollama is not running. Start it with: ollama serve\n"
-                "Install from: https://ollama.ai"
-            )
+        """Test if Ollama is running and model is available (memoized per server)."""
+        model_names = list(ollama_models(self.base_url))
+        if not any(self.model.startswith(name.split(":")[0]) for name in model_names):
+            logger.warning(f"Model {self.model} not found. Available models: {model_names}")
+            logger.info(f"Pull the model with: ollama pull {self.model}")
     
     def generate(
         self,
@@ -83,7 +112,8 @@ class OllamaLLM:
         system_prompt: Optional[str] = None,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        stream: bool = False
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> LocalLLMResponse:
         """
         Generate response from local LLM.
@@ -94,53 +124,28 @@ class OllamaLLM:
             temperature: Override default temperature.
             max_tokens: Override default max tokens.
             stream: Whether to stream the response.
+            on_token: Called with each piece of text as it is generated
+                when streaming.
             
         Returns:
             LocalLLMResponse object.
         """
-        temperature = temperature or self.temperature
-        max_tokens = max_tokens or self.max_tokens
-        
-        # Format the full prompt
-        if system_prompt:
-            full_prompt = f"System: {system_prompt}\n\nUser: {prompt}\n\nAssistant:"
-        else:
-            full_prompt = prompt
-        
         logger.debug(f"Generating response for prompt: {prompt[:100]}...")
         
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": full_prompt,
-                    "temperature": temperature,
-                    "num_predict": max_tokens,
-                    "stream": stream
-                },
-                stream=stream
-            )
+            response = self._post_generate(prompt, system_prompt, temperature, max_tokens, stream)
             
-            if stream:
-                # Handle streaming response
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        chunk = json.loads(line)
-                        if "response" in chunk:
-                            full_response += chunk["response"]
-                            if chunk.get("done", False):
-                                return LocalLLMResponse(
-                                    answer=full_response,
-                                    model_used=self.model,
-                                    tokens_generated=chunk.get("eval_count", 0),
-                                    time_taken=chunk.get("total_duration", 0) / 1e9
-                                )
+            if stream and response.status_code == 200:
+                # Handle streaming response, forwarding text as it arrives
+                for item in self._iter_stream(response):
+                    if isinstance(item, LocalLLMResponse):
+                        return item
+                    if on_token:
+                        on_token(item)
             else:
                 # Handle non-streaming response
                 if response.status_code == 200:
-                    data = response.json()
+                    data = json_loads(response.content)
                     return LocalLLMResponse(
                         answer=data["response"],
                         model_used=self.model,
@@ -165,11 +170,132 @@ class OllamaLLM:
                 time_taken=0
             )
     
+    def _post_generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        stream: bool
+    ) -> requests.Response:
+        """
+        POST a prompt to /api/generate, retrying transient failures.
+        
+        Only this call is retried, never the retrieval that produced the
+        prompt. Retries happen before any token is read, so a streamed
+        answer is never repeated.
+        """
+        full_prompt = self._full_prompt(system_prompt, prompt)
+        # Sampling settings are only honoured inside "options"
+        body = json_dumps({
+            "model": self.model,
+            "prompt": full_prompt,
+            "options": {
+                "temperature": self.temperature if temperature is None else temperature,
+                "num_predict": self.max_tokens if max_tokens is None else max_tokens
+            },
+            "stream": stream
+        })
+        
+        for attempt in range(self.RETRY_ATTEMPTS):
+            last = attempt == self.RETRY_ATTEMPTS - 1
+            try:
+                response = self._session.post(
+                    f"{self.base_url}/api/generate", data=body, stream=stream
+                )
+            except requests.exceptions.ConnectionError:
+                if last:
+                    raise
+            else:
+                # 503: the server's request queue is full
+                if response.status_code != 503 or last:
+                    return response
+                response.close()
+            logger.warning(f"Ollama request failed, retrying ({attempt + 1}/{self.RETRY_ATTEMPTS})")
+            time.sleep(0.5 * 2 ** attempt)
+    
+    def _iter_stream(self, response: requests.Response) -> Iterator[Union[str, LocalLLMResponse]]:
+        """
+        Yield streamed text pieces, then the assembled LocalLLMResponse.
+        
+        The body is read to its end even after the "done" line: only a fully
+        read response hands its keep-alive connection back to the pool,
+        otherwise every streamed answer would open a new connection.
+        """
+        parts = []
+        chunk = {}
+        final = None
+        try:
+            for line in response.iter_lines():
+                if not line or final is not None:
+                    continue
+                chunk = json_loads(line)
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    yield token
+                if chunk.get("done", False):
+                    final = chunk
+        finally:
+            # Abandoned mid-stream: drop the connection rather than leak it
+            response.close()
+        yield LocalLLMResponse(
+            answer="".join(parts),
+            model_used=self.model,
+            tokens_generated=chunk.get("eval_count", 0),
+            time_taken=chunk.get("total_duration", 0) / 1e9
+        )
+    
+    def stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[Union[str, LocalLLMResponse]]:
+        """
+        Generate a response incrementally.
+        
+        Args:
+            prompt: User prompt.
+            system_prompt: System prompt.
+            temperature: Override default temperature.
+            max_tokens: Override default max tokens.
+            
+        Yields:
+            Text pieces as they are generated, then (last) the complete
+            LocalLLMResponse.
+        """
+        try:
+            response = self._post_generate(prompt, system_prompt, temperature, max_tokens, True)
+            if response.status_code != 200:
+                logger.error(f"Failed to generate response: {response.text}")
+                yield LocalLLMResponse(
+                    answer="Error generating response",
+                    model_used=self.model,
+                    tokens_generated=0,
+                    time_taken=0
+                )
+                return
+            yield from self._iter_stream(response)
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            yield LocalLLMResponse(
+                answer=f"Error: {str(e)}",
+                model_used=self.model,
+                tokens_generated=0,
+                time_taken=0
+            )
+    
     def generate_with_context(
         self,
         query: str,
         context: str,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> LocalLLMResponse:
         """
         Generate response with RAG context.
@@ -178,23 +304,82 @@ class OllamaLLM:
             query: User query.
             context: Retrieved context.
             system_prompt: Optional system prompt.
+            temperature: Override default temperature.
+            max_tokens: Override default max tokens.
+            stream: Whether to stream the response.
+            on_token: Called with each piece of text as it is generated.
             
         Returns:
             LocalLLMResponse object.
         """
-        if system_prompt is None:
-            system_prompt = """You are a helpful AI assistant with access to a document knowledge base. 
-            Use the provided context to answer questions accurately. 
-            If the context doesn't contain relevant information, say so clearly."""
-        
-        prompt = f"""Based on the following context, please answer this question: {query}
-
-Context:
-{context}
-
-Please provide a comprehensive answer based on the context provided. If the context doesn't contain enough information, acknowledge this limitation."""
+        prompt = self._context_prompt(query, context, system_prompt)
+        return self.generate(
+            prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=stream,
+            on_token=on_token
+        )
+    
+    def stream_with_context(
+        self,
+        query: str,
+        context: str,
+        system_prompt: Optional[str] = None
+    ) -> Iterator[Union[str, LocalLLMResponse]]:
+        """
+        Generate a response with RAG context incrementally.
         
-        return self.generate(prompt, system_prompt)
+        Args:
+            query: User query.
+            context: Retrieved context.
+            system_prompt: Optional system prompt.
+            
+        Yields:
+            Text pieces as they are generated, then (last) the complete
+            LocalLLMResponse.
+        """
+        prompt = self._context_prompt(query, context, system_prompt)
+        return self.stream(prompt)
+    
+    @staticmethod
+    def _full_prompt(system_prompt: Optional[str], *prompt_parts: str) -> str:
+        """Join the optional system block and the user prompt parts into one string."""
+        if not system_prompt:
+            return "".join(prompt_parts)
+        return "".join(("System: ", system_prompt, "\n\nUser: ", *prompt_parts, "\n\nAssistant:"))
+    
+    @classmethod
+    def _context_prompt(
+        cls,
+        query: str,
+        context: str,
+        system_prompt: Optional[str]
+    ) -> str:
+        """
+        Build the complete RAG prompt, system block included, in a single
+        join (question last); the context is copied once, not once per layer.
+        """
+        if system_prompt is None:
+            system_prompt = cls.DEFAULT_SYSTEM_PROMPT
+        return cls._full_prompt(
+            system_prompt, cls.CONTEXT_PROMPT_HEAD, context, cls.CONTEXT_PROMPT_TAIL, query
+        )
+    
+    def close(self):
+        """Close pooled connections to the Ollama server."""
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __del__(self):
+        self.close()
 
 
 class LlamaCppLLM:
@@ -219,9 +404,7 @@ class LlamaCppLLM:
             n_threads: Number of CPU threads.
             n_gpu_layers: Number of layers to offload to GPU.
         """
-        try:
-            from llama_cpp import Llama
-        except ImportError:
+        if Llama is None:
             raise ImportError(
                 "llama-cpp-python not installed. Run:\n"
                 "pip install llama-cpp-python\n"
@@ -246,7 +429,6 @@ class LlamaCppLLM:
         top_p: float = 0.95
     ) -> LocalLLMResponse:
         """Generate response."""
-        import time
         start = time.time()
         
         response = self.model(
@@ -0,0 +1,92 @@
+"""Shared Ollama helpers: JSON body codecs and memoized server probes."""
+
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+import json
+import time
+import requests
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data: bytes) -> Any:
+    """Decode a JSON response body (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Encode a JSON request body as UTF-8 bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def session_headers(base_url: str) -> Dict[str, str]:
+    """
+    Default headers for a client session talking to ``base_url``.
+    
+    Loopback servers are asked not to gzip responses: decompression costs
+    more than the bytes it saves when there is no network in between.
+    """
+    headers = {"Content-Type": "application/json"}
+    if urlparse(base_url).hostname in ("localhost", "127.0.0.1", "::1"):
+        headers["Accept-Encoding"] = "identity"
+    return headers
+
+
+# One keep-alive connection for the probes of every client in the process
+_session = requests.Session()
+
+# Seconds a model listing is reused; models pulled later show up after this
+MODELS_TTL = 5.0
+# (connect, read) timeouts so probes can't hang on a dead or half-open server
+PROBE_TIMEOUT = (1.0, 2.0)
+# base_url -> (monotonic time fetched, model names)
+_models_cache: Dict[str, Tuple[float, Tuple[str, ...]]] = {}
+
+
+def ollama_models(base_url: str) -> Tuple[str, ...]:
+    """
+    Names of the models installed on an Ollama server.
+
+    Cached per base_url for MODELS_TTL seconds, so constructing several
+    clients costs one round-trip. Failures are not cached; the next call
+    retries.
+
+    Raises:
+        ConnectionError: If the server is not running or not responding.
+    """
+    cached = _models_cache.get(base_url)
+    if cached is not None and time.monotonic() - cached[0] < MODELS_TTL:
+        return cached[1]
+    try:
+        response = _session.get(f"{base_url}/api/tags", timeout=PROBE_TIMEOUT)
+    except requests.exceptions.ConnectionError:
+        raise ConnectionError(
+            "Ollama is not running. Start it with: ollama serve\n"
+            "Install from: https://ollama.ai"
+        )
+    except requests.exceptions.Timeout:
+        raise ConnectionError(f"Ollama not responding at {base_url}")
+    if response.status_code != 200:
+        raise ConnectionError(f"Ollama not responding at {base_url}")
+    names = tuple(m["name"] for m in response.json().get("models", []))
+    _models_cache[base_url] = (time.monotonic(), names)
+    return names
+
+
+@lru_cache(maxsize=4)
+def ollama_version(base_url: str) -> Optional[Tuple[int, ...]]:
+    """Server version as a tuple of ints, or None if it cannot be determined."""
+    try:
+        response = _session.get(f"{base_url}/api/version", timeout=PROBE_TIMEOUT)
+        version = response.json()["version"]
+        return tuple(int(p) for p in version.split("-")[0].split(".")[:3])
+    except Exception:
+        return None
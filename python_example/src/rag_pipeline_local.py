@@ -1,27 +1,51 @@
 """Local RAG pipeline - ZERO COST, runs entirely on your machine."""
 
 import os
-from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any, Callable, Deque, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+)
+import hashlib
+import itertools
 import logging
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
 import time
 
+import numpy as np
+
 try:
     # When run as part of package
-    from src.embeddings_local import OllamaEmbeddings, SentenceTransformerEmbeddings
+    from src.embeddings_local import OllamaEmbeddings, SentenceTransformerEmbeddings, OnnxEmbeddings
     from src.vector_store_lancedb import LanceDBVectorStore
     from src.llm_local import OllamaLLM, LocalLLMResponse
-    from src.chunking import TextChunker, MarkdownChunker, Chunk
+    from src.chunking import TextChunker, MarkdownChunker, Chunk, iter_file_windows
+    from src.semantic_cache import SemanticCache
+    from src.reranker_local import OnnxCrossEncoder
 except ImportError:
     # When imported from tests
-    from embeddings_local import OllamaEmbeddings, SentenceTransformerEmbeddings
+    from embeddings_local import OllamaEmbeddings, SentenceTransformerEmbeddings, OnnxEmbeddings
     from vector_store_lancedb import LanceDBVectorStore
     from llm_local import OllamaLLM, LocalLLMResponse
-    from chunking import TextChunker, MarkdownChunker, Chunk
+    from chunking import TextChunker, MarkdownChunker, Chunk, iter_file_windows
+    from semantic_cache import SemanticCache
+    from reranker_local import OnnxCrossEncoder
 
 logger = logging.getLogger(__name__)
 
 
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield successive lists of up to ``size`` items."""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 @dataclass
 class LocalRAGResponse:
     """Response from local RAG pipeline."""
@@ -34,6 +58,83 @@ class LocalRAGResponse:
     cost: float = 0.0  # Always zero for local!
 
 
+class QueryCache:
+    """Thread-safe LRU + TTL cache of complete RAG responses."""
+    
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 300.0):
+        """
+        Initialize the query cache.
+        
+        Args:
+            max_size: Maximum number of responses kept.
+            ttl_seconds: Seconds a response stays valid.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, LocalRAGResponse]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(
+        query: str,
+        top_k: int,
+        use_hybrid_search: bool,
+        system_prompt: Optional[str],
+        max_tokens: int,
+        temperature: float
+    ) -> str:
+        """Cache key for a query (whitespace and case are normalized)."""
+        norm = " ".join(query.split()).lower()
+        raw = f"{norm}|{top_k}|{use_hybrid_search}|{system_prompt}|{max_tokens}|{temperature}"
+        return hashlib.blake2b(raw.encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[LocalRAGResponse]:
+        """Return the cached response for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: str, response: LocalRAGResponse):
+        """Store a response, evicting the least recently used if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: str):
+        """Drop a single cached response."""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counts plus current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+
 class LocalRAGPipeline:
     """Complete local RAG pipeline - ZERO API costs.
     
@@ -45,6 +146,12 @@ class LocalRAGPipeline:
     - Hybrid search for better results
     """
     
+    # Characters of each retrieved chunk shown in LocalRAGResponse.sources
+    SOURCE_PREVIEW_CHARS = 200
+    
+    # Vector search candidates per final result when a reranker is enabled
+    RERANK_CANDIDATES_PER_RESULT = 10
+    
     def __init__(
         self,
         llm_model: str = "tinyllama:latest",
@@ -52,7 +159,10 @@ class LocalRAGPipeline:
         collection_name: str = "local_rag_documents",
         chunk_size: int = 512,
         chunk_overlap: int = 50,
-        use_sentence_transformers: bool = False
+        use_sentence_transformers: Union[bool, str] = False,
+        warmup: bool = False,
+        semantic_answers: bool = False,
+        reranker_model: Optional[str] = None
     ):
         """
         Initialize local RAG pipeline.
@@ -63,10 +173,25 @@ class LocalRAGPipeline:
             collection_name: Name for vector store collection.
             chunk_size: Size of text chunks.
             chunk_overlap: Overlap between chunks.
-            use_sentence_transformers: Use ST instead of Ollama for embeddings.
+            use_sentence_transformers: Use ST instead of Ollama for embeddings;
+                "onnx" runs the ST model through ONNX Runtime with INT8 weights.
+            warmup: Load models and open the table now (see warmup()) so the
+                first query is not a cold-start outlier.
+            semantic_answers: Also reuse whole answers for near-identical
+                queries (cosine similarity above the semantic cache threshold),
+                skipping retrieval and generation.
+            reranker_model: HuggingFace cross-encoder (e.g.
+                "cross-encoder/ms-marco-MiniLM-L-6-v2") used to rerank
+                RERANK_CANDIDATES_PER_RESULT x top_k vector search candidates
+                down to top_k. Runs through ONNX Runtime; None disables.
         """
         # Initialize embeddings
-        if use_sentence_transformers:
+        if use_sentence_transformers == "onnx":
+            if "/" not in embedding_model:
+                embedding_model = f"sentence-transformers/{embedding_model}"
+            self.embeddings = OnnxEmbeddings(model_name=embedding_model)
+            embedding_dim = 384  # for all-MiniLM-L6-v2
+        elif use_sentence_transformers:
             self.embeddings = SentenceTransformerEmbeddings(model_name=embedding_model)
             embedding_dim = 384  # for all-MiniLM-L6-v2
         else:
@@ -83,32 +208,77 @@ class LocalRAGPipeline:
         # Initialize local LLM
         self.llm = OllamaLLM(model=llm_model)
         
-        # Initialize chunkers
+        # Optional second retrieval stage
+        self.reranker = OnnxCrossEncoder(model_name=reranker_model) if reranker_model else None
+        
+        # Initialize chunkers (results cached by content hash)
+        chunk_cache_dir = str(Path(__file__).parent.parent / "data" / "cache")
+        chunk_workers = os.cpu_count() or 1
         self.text_chunker = TextChunker(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            max_workers=chunk_workers,
+            cache_dir=chunk_cache_dir
         )
         self.markdown_chunker = MarkdownChunker(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            max_workers=chunk_workers,
+            cache_dir=chunk_cache_dir
         )
         
+        # Reuse full responses for repeated queries and retrieval results
+        # for paraphrased ones
+        self._query_cache = QueryCache()
+        self.semantic_cache = SemanticCache()
+        self.answer_cache = SemanticCache() if semantic_answers else None
+        
         logger.info(f"Initialized LOCAL RAG pipeline - ZERO COST!")
         logger.info(f"LLM: {llm_model}, Embeddings: {embedding_model}")
+        
+        if warmup:
+            self.warmup()
+    
+    def warmup(self):
+        """
+        Pay one-time startup costs up front.
+        
+        Loads the embedding model and the LLM weights into memory, opens the
+        pooled HTTP connections, opens the LanceDB table and loads small
+        tables into memory for exact search. Failures are logged and
+        otherwise ignored; the first query will simply be slower.
+        """
+        start = time.perf_counter()
+        steps = (
+            ("embedding model", lambda: self.embeddings.embed_query("warmup")),
+            ("LLM", lambda: self.llm.generate("warmup", max_tokens=1)),
+            ("vector store", self.vector_store.warmup),
+        )
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} failed: {e}")
+        logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
     
     def add_documents(
         self,
         documents: List[str],
         metadatas: Optional[List[Dict[str, Any]]] = None,
-        document_type: str = "text"
+        document_type: str = "text",
+        batch_size: int = 256
     ) -> int:
         """
         Add documents to the RAG system.
         
+        Chunking, embedding and storage are pipelined: while one batch of
+        chunks is embedded and written, the next is being chunked.
+        
         Args:
             documents: List of document texts.
             metadatas: Optional metadata for each document.
             document_type: Type of documents ('text' or 'markdown').
+            batch_size: Chunks embedded and stored per batch.
             
         Returns:
             Number of chunks created.
@@ -117,47 +287,122 @@ class LocalRAGPipeline:
             return 0
         
         metadatas = metadatas or [{} for _ in documents]
-        all_chunks = []
         
         # Choose appropriate chunker
         chunker = self.markdown_chunker if document_type == "markdown" else self.text_chunker
         
-        # Process each document
-        for i, (doc, meta) in enumerate(zip(documents, metadatas)):
-            logger.info(f"Processing document {i+1}/{len(documents)}")
-            
-            # Add document metadata
-            doc_metadata = {
-                **meta,
-                "document_index": i,
-                "document_type": document_type
-            }
-            
-            # Chunk the document
-            chunks = chunker.chunk_text(doc, doc_metadata)
-            all_chunks.extend(chunks)
-        
-        # Extract texts and metadata from chunks
-        chunk_texts = [chunk.text for chunk in all_chunks]
-        chunk_metadatas = [chunk.metadata for chunk in all_chunks]
-        
-        # Add to vector store (embeddings are cached!)
-        self.vector_store.add_documents(
-            texts=chunk_texts,
-            metadatas=chunk_metadatas
+        # Add document metadata
+        doc_metadatas = [
+            {**meta, "document_index": i, "document_type": document_type}
+            for i, meta in enumerate(metadatas)
+        ]
+        
+        # Chunk in parallel (worker processes, results in order) and store
+        # each batch as soon as it is complete (embeddings are cached!)
+        logger.info(f"Chunking {len(documents)} documents")
+        total = self._store_chunks(
+            itertools.chain.from_iterable(chunker.iter_chunk_texts(documents, doc_metadatas)),
+            batch_size
         )
         
-        logger.info(f"Added {len(all_chunks)} chunks from {len(documents)} documents")
-        return len(all_chunks)
+        logger.info(f"Added {total} chunks from {len(documents)} documents")
+        return total
+    
+    def add_file(
+        self,
+        path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        document_type: Optional[str] = None,
+        batch_size: int = 64,
+        window_size: int = 1 << 20
+    ) -> int:
+        """
+        Add a file to the RAG system without loading it into memory at once.
+        
+        The file is read in paragraph-aligned windows; chunks are embedded
+        and stored in batches as they are produced.
+        
+        Args:
+            path: Path to a UTF-8 text or Markdown file.
+            metadata: Optional metadata attached to every chunk.
+            document_type: 'text' or 'markdown'; inferred from the suffix if None.
+            batch_size: Chunks embedded and stored per batch.
+            window_size: Bytes of the file decoded and chunked at a time; peak
+                memory is about this times twice the chunker's worker count,
+                plus a few batches of chunks.
+            
+        Returns:
+            Number of chunks created.
+        """
+        path = Path(path)
+        if document_type is None:
+            document_type = "markdown" if path.suffix in [".md", ".markdown"] else "text"
+        chunker = self.markdown_chunker if document_type == "markdown" else self.text_chunker
+        doc_metadata = {**(metadata or {}), "document_type": document_type}
+        
+        def file_chunks() -> Iterator[Chunk]:
+            index = 0
+            # Windows are chunked in worker processes, a few ahead of storage
+            windows = iter_file_windows(str(path), window_size=window_size)
+            for window_chunks in chunker.iter_chunk_stream(windows, doc_metadata):
+                for chunk in window_chunks:
+                    # Number chunks across the whole file; the total is not known upfront
+                    chunk.metadata["chunk_index"] = index
+                    chunk.metadata.pop("total_chunks", None)
+                    index += 1
+                    yield chunk
+        
+        total = self._store_chunks(file_chunks(), batch_size)
+        logger.info(f"Added {total} chunks from {path.name}")
+        return total
+    
+    def _store_chunks(self, chunks: Iterable[Chunk], batch_size: int) -> int:
+        """
+        Embed and store chunks in batches on a background thread.
+        
+        Producing the chunks (the caller's iterator, usually CPU-bound
+        chunking) overlaps with embedding and writing earlier batches. One
+        writer thread keeps writes in order; at most two batches wait in the
+        queue so memory stays bounded.
+        
+        Returns:
+            Number of chunks stored.
+        """
+        total = 0
+        in_flight: Deque[Future] = deque()
+        
+        def store(batch: List[Chunk]):
+            self.vector_store.add_documents(
+                texts=[chunk.text for chunk in batch],
+                metadatas=[chunk.metadata for chunk in batch],
+                refresh=False
+            )
+        
+        try:
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-ingest") as writer:
+                for batch in _batched(chunks, batch_size):
+                    if len(in_flight) >= 2:
+                        in_flight.popleft().result()
+                    in_flight.append(writer.submit(store, batch))
+                    total += len(batch)
+                while in_flight:
+                    in_flight.popleft().result()
+        finally:
+            # Whatever made it in is searchable, even if a batch failed
+            self.vector_store.refresh_indexes()
+            self._invalidate_caches()
+        return total
     
     def query(
         self,
         query: str,
         top_k: int = 5,
-        max_tokens: int = 1000,
-        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
         system_prompt: Optional[str] = None,
-        use_hybrid_search: bool = True
+        use_hybrid_search: bool = True,
+        stream: bool = False,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> LocalRAGResponse:
         """
         Query the RAG system - completely local, zero cost.
@@ -165,10 +410,12 @@ class LocalRAGPipeline:
         Args:
             query: User query.
             top_k: Number of context chunks to retrieve.
-            max_tokens: Maximum tokens in response.
-            temperature: Generation temperature.
+            max_tokens: Maximum tokens in response (default: the LLM's).
+            temperature: Generation temperature (default: the LLM's).
             system_prompt: Optional custom system prompt.
             use_hybrid_search: Use both vector and keyword search.
+            stream: Stream the answer from the LLM as it is generated.
+            on_token: Called with each piece of the answer when streaming.
             
         Returns:
             LocalRAGResponse object.
@@ -176,39 +423,326 @@ class LocalRAGPipeline:
         start_time = time.time()
         logger.info(f"Processing query locally: {query[:100]}...")
         
-        # Retrieve relevant context with hybrid search
-        search_results = self.vector_store.search(
-            query, 
-            top_k=top_k,
-            hybrid_search=use_hybrid_search
-        )
+        # Identical (or, if enabled, near-identical) questions skip search
+        # and generation entirely
+        settings = self._generation_settings(max_tokens, temperature)
+        cache_key = QueryCache.make_key(query, top_k, use_hybrid_search, system_prompt, *settings)
+        answer_key = (top_k, use_hybrid_search, system_prompt, *settings)
+        cached, query_embedding = self._cached_answer(query, cache_key, answer_key)
+        if cached is not None:
+            if stream and on_token:
+                on_token(cached.answer)
+            return replace(cached, query=query, time_taken=time.time() - start_time)
         
-        if not search_results:
-            logger.warning("No relevant context found")
-            context = "No relevant context found in the knowledge base."
-            sources = []
-        else:
-            # Format context from search results
-            context_parts = []
-            sources = []
-            
-            for i, (doc, score, meta) in enumerate(search_results, 1):
-                context_parts.append(f"[Context {i}]\n{doc}")
-                sources.append((doc[:200] + "..." if len(doc) > 200 else doc, score))
-            
-            context = "\n\n".join(context_parts)
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        context, sources = self._format_context(
+            self._retrieve(query, query_embedding, top_k, use_hybrid_search)
+        )
         
         # Generate response using local LLM
         logger.info("Generating response with local LLM...")
         llm_response = self.llm.generate_with_context(
+            query=query,
+            context=context,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=stream,
+            on_token=on_token
+        )
+        
+        return self._make_response(
+            query, cache_key, llm_response, sources, context, time.time() - start_time,
+            answer_key=answer_key, query_embedding=query_embedding
+        )
+    
+    def query_stream(
+        self,
+        query: str,
+        top_k: int = 5,
+        system_prompt: Optional[str] = None,
+        use_hybrid_search: bool = True
+    ) -> Iterator[Union[str, LocalRAGResponse]]:
+        """
+        Query the RAG system, yielding the answer as it is generated.
+        
+        Retrieval is the same as query(); the first text arrives as soon as
+        the LLM produces it instead of after the whole answer.
+        
+        Args:
+            query: User query.
+            top_k: Number of context chunks to retrieve.
+            system_prompt: Optional custom system prompt.
+            use_hybrid_search: Use both vector and keyword search.
+            
+        Yields:
+            Pieces of the answer (str), then the complete LocalRAGResponse.
+        """
+        start_time = time.time()
+        logger.info(f"Streaming query locally: {query[:100]}...")
+        
+        settings = self._generation_settings()
+        cache_key = QueryCache.make_key(query, top_k, use_hybrid_search, system_prompt, *settings)
+        answer_key = (top_k, use_hybrid_search, system_prompt, *settings)
+        cached, query_embedding = self._cached_answer(query, cache_key, answer_key)
+        if cached is not None:
+            yield cached.answer
+            yield replace(cached, query=query, time_taken=time.time() - start_time)
+            return
+        
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        context, sources = self._format_context(
+            self._retrieve(query, query_embedding, top_k, use_hybrid_search)
+        )
+        
+        logger.info("Streaming response from local LLM...")
+        for item in self.llm.stream_with_context(
             query=query,
             context=context,
             system_prompt=system_prompt
+        ):
+            if isinstance(item, LocalLLMResponse):
+                yield self._make_response(
+                    query, cache_key, item, sources, context, time.time() - start_time,
+                    answer_key=answer_key, query_embedding=query_embedding
+                )
+            else:
+                yield item
+    
+    def batch_query(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        system_prompt: Optional[str] = None,
+        use_hybrid_search: bool = True,
+        max_workers: int = 4
+    ) -> List[LocalRAGResponse]:
+        """
+        Answer several queries together.
+        
+        Uses the same response and semantic answer caches as query().
+        Uncached queries are embedded in one batched call and searched in
+        parallel; answers are generated concurrently (Ollama serves
+        OLLAMA_NUM_PARALLEL requests at once).
+        
+        Args:
+            queries: User queries.
+            top_k: Number of context chunks to retrieve per query.
+            system_prompt: Optional custom system prompt.
+            use_hybrid_search: Use both vector and keyword search.
+            max_workers: Concurrent generation requests.
+            
+        Returns:
+            One LocalRAGResponse per query, in input order.
+        """
+        start_time = time.time()
+        responses: List[Optional[LocalRAGResponse]] = [None] * len(queries)
+        settings = self._generation_settings()
+        cache_keys = [
+            QueryCache.make_key(q, top_k, use_hybrid_search, system_prompt, *settings)
+            for q in queries
+        ]
+        answer_key = (top_k, use_hybrid_search, system_prompt, *settings)
+        
+        # Full-response cache first
+        pending = []
+        for i, (query, cache_key) in enumerate(zip(queries, cache_keys)):
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                responses[i] = replace(cached, query=query, time_taken=time.time() - start_time)
+            else:
+                pending.append(i)
+        if not pending:
+            return responses
+        
+        # One embedding call for every remaining query
+        embeddings = dict(zip(pending, self.embed_queries([queries[i] for i in pending])))
+        
+        # Answers cached for near-identical queries
+        if self.answer_cache is not None:
+            misses = []
+            for i in pending:
+                cached = self.answer_cache.get(embeddings[i], key=answer_key)
+                if cached is not None:
+                    responses[i] = replace(
+                        cached, query=queries[i], time_taken=time.time() - start_time
+                    )
+                else:
+                    misses.append(i)
+            pending = misses
+            if not pending:
+                return responses
+        
+        # Semantic cache, then one parallel search for the misses
+        search_key = (top_k, use_hybrid_search)
+        search_results = {}
+        to_search = []
+        for i in pending:
+            embedding = embeddings[i]
+            cached = self.semantic_cache.get(embedding, key=search_key)
+            if cached is None:
+                to_search.append((i, embedding))
+            else:
+                search_results[i] = cached
+        if to_search:
+            found = self.vector_store.batch_search(
+                [embedding for _, embedding in to_search],
+                queries=[queries[i] for i, _ in to_search],
+                top_k=self._candidate_count(top_k),
+                hybrid_search=use_hybrid_search
+            )
+            for (i, embedding), results in zip(to_search, found):
+                results = self._rerank(queries[i], results, top_k)
+                search_results[i] = results
+                self.semantic_cache.put(embedding, results, key=search_key)
+        
+        # Generate answers concurrently, keeping input order
+        contexts = {i: self._format_context(search_results[i]) for i in pending}
+        
+        def generate(i: int) -> LocalLLMResponse:
+            return self.llm.generate_with_context(
+                query=queries[i],
+                context=contexts[i][0],
+                system_prompt=system_prompt
+            )
+        
+        logger.info(f"Generating {len(pending)} responses with local LLM...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            llm_responses = list(executor.map(generate, pending))
+        
+        for i, llm_response in zip(pending, llm_responses):
+            context, sources = contexts[i]
+            responses[i] = self._make_response(
+                queries[i], cache_keys[i], llm_response, sources, context,
+                time.time() - start_time,
+                answer_key=answer_key, query_embedding=embeddings[i]
+            )
+        return responses
+    
+    def _generation_settings(
+        self,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ) -> Tuple[int, float]:
+        """The (max_tokens, temperature) a generation will use; part of every cache key."""
+        return (
+            self.llm.max_tokens if max_tokens is None else max_tokens,
+            self.llm.temperature if temperature is None else temperature
         )
+    
+    def _cached_answer(
+        self,
+        query: str,
+        cache_key: str,
+        answer_key: Hashable
+    ) -> Tuple[Optional[LocalRAGResponse], Optional[np.ndarray]]:
+        """
+        Cached response for this query, or for a near-identical one if enabled.
         
-        total_time = time.time() - start_time
+        Returns:
+            (response or None, query embedding if one was computed), so a
+            miss doesn't embed the query a second time.
+        """
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Returning cached response")
+            return cached, None
+        if self.answer_cache is None:
+            return None, None
+        query_embedding = self.embed_query(query)
+        cached = self.answer_cache.get(query_embedding, key=answer_key)
+        if cached is not None:
+            logger.info("Returning response cached for a similar query")
+        return cached, query_embedding
+    
+    def _retrieve(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        use_hybrid_search: bool
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Search for context, reusing results for near-duplicate queries."""
+        search_key = (top_k, use_hybrid_search)
+        search_results = self.semantic_cache.get(query_embedding, key=search_key)
+        if search_results is None:
+            search_results = self.vector_store.search(
+                query, 
+                top_k=self._candidate_count(top_k),
+                hybrid_search=use_hybrid_search,
+                query_embedding=query_embedding
+            )
+            search_results = self._rerank(query, search_results, top_k)
+            self.semantic_cache.put(query_embedding, search_results, key=search_key)
+        return search_results
+    
+    def _candidate_count(self, top_k: int) -> int:
+        """Results to request from the vector store for a final ``top_k``."""
+        if self.reranker is None:
+            return top_k
+        return top_k * self.RERANK_CANDIDATES_PER_RESULT
+    
+    def _rerank(
+        self,
+        query: str,
+        results: List[Tuple[str, float, Dict[str, Any]]],
+        top_k: int
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Narrow vector search candidates to ``top_k`` with the reranker, if any."""
+        if self.reranker is None:
+            return results
+        return self.reranker.rerank(query, results, top_k)
+    
+    @classmethod
+    def _format_context(
+        cls,
+        search_results: List[Tuple[str, float, Dict[str, Any]]]
+    ) -> Tuple[str, List[Tuple[str, float]]]:
+        """Build the LLM context and the source previews from search results."""
+        if not search_results:
+            logger.warning("No relevant context found")
+            return "No relevant context found in the knowledge base.", []
+        
+        # Format context from search results: headers and documents go into
+        # one flat list so the context string is built by a single join
+        context_parts = []
+        sources = []
+        
+        limit = cls.SOURCE_PREVIEW_CHARS
+        half = limit // 2
+        for i, (doc, score, meta) in enumerate(search_results, 1):
+            context_parts += ("\n\n[Context ", str(i), "]\n", doc)
+            # str length is O(1); long chunks are cut at the last space in the
+            # preview window (scanning at most `limit` characters) rather than
+            # mid-word. textwrap.shorten would re-split the whole chunk.
+            if len(doc) > limit:
+                cut = doc.rfind(" ", half, limit + 1)
+                doc = doc[:cut if cut != -1 else limit].rstrip() + "..."
+            sources.append((doc, score))
         
-        return LocalRAGResponse(
+        # Drop the separator in front of the first header
+        context_parts[0] = "[Context "
+        return "".join(context_parts), sources
+    
+    def _make_response(
+        self,
+        query: str,
+        cache_key: str,
+        llm_response: LocalLLMResponse,
+        sources: List[Tuple[str, float]],
+        context: str,
+        total_time: float,
+        answer_key: Hashable = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> LocalRAGResponse:
+        """
+        Assemble a response and remember it in the query cache (and, when
+        ``answer_key`` and ``query_embedding`` are given, in the semantic
+        answer cache).
+        """
+        response = LocalRAGResponse(
             answer=llm_response.answer,
             sources=sources,
             query=query,
@@ -217,10 +751,53 @@ class LocalRAGPipeline:
             time_taken=total_time,
             cost=0.0  # ZERO COST!
         )
+        # Failed generations report no tokens; don't pin those in the cache
+        if llm_response.tokens_generated:
+            self._query_cache.put(cache_key, response)
+            if (
+                self.answer_cache is not None
+                and answer_key is not None
+                and query_embedding is not None
+            ):
+                self.answer_cache.put(query_embedding, response, key=answer_key)
+        return response
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a query as a float32 vector.
+        
+        Caching is left to the embeddings backend (OllamaEmbeddings keeps an
+        in-memory LRU in front of its disk cache), so there is one cache.
+        
+        Args:
+            query: Query text.
+            
+        Returns:
+            Float32 embedding.
+        """
+        return np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed several queries in one call, as an (n, dim) float32 array.
+        
+        Backends with a query cache (OllamaEmbeddings.embed_queries) share it
+        with embed_query; others embed the batch directly.
+        """
+        embed = getattr(self.embeddings, "embed_queries", self.embeddings.embed_documents)
+        return np.asarray(embed(queries), dtype=np.float32)
+    
+    def _invalidate_caches(self):
+        """Drop cached answers and retrieval results after the corpus changes."""
+        self._query_cache.clear()
+        self.semantic_cache.clear()
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
     
     def clear_knowledge_base(self):
         """Clear all documents from the knowledge base."""
         self.vector_store.clear()
+        self._invalidate_caches()
         logger.info("Knowledge base cleared")
     
     def get_stats(self) -> Dict[str, Any]:
@@ -232,6 +809,10 @@ class LocalRAGPipeline:
             "chunk_size": self.text_chunker.chunk_size,
             "chunk_overlap": self.text_chunker.chunk_overlap,
             "vector_store_type": "LanceDB",
+            "query_cache": self._query_cache.stats(),
+            "semantic_cache_hits": self.semantic_cache.hits,
+            "semantic_answer_hits": self.answer_cache.hits if self.answer_cache is not None else 0,
+            "reranker": self.reranker.model_name if self.reranker is not None else None,
             "cost_per_query": 0.0,
             "api_keys_required": 0,
             "fully_local": True
@@ -242,40 +823,81 @@ class LocalRAGPipeline:
     def optimize_for_performance(self):
         """Optimize the pipeline for better performance."""
         # Create ANN index in LanceDB for faster search
-        self.vector_store.create_index(metric="L2", nprobes=20)
+        self.vector_store.create_index(nprobes=20)
         logger.info("Created ANN index for faster search")
     
-    def benchmark(self, test_query: str = "What is this document about?") -> Dict[str, float]:
+    def benchmark(
+        self,
+        test_query: str = "What is this document about?",
+        num_queries: int = 32,
+        max_workers: int = 8,
+        max_tokens: int = 100
+    ) -> Dict[str, float]:
         """
         Benchmark the local pipeline performance.
         
+        Stage times are measured separately (search uses a precomputed
+        embedding, so it excludes embedding time). Retrieval throughput is
+        measured by running ``num_queries`` distinct embed+search calls
+        concurrently. Embedded queries carry a per-run tag, so neither the
+        in-process nor the on-disk embedding cache can answer them.
+        
         Args:
             test_query: Query to test with.
+            num_queries: Queries used for the latency percentiles and throughput.
+            max_workers: Concurrent retrieval calls for the throughput run.
+            max_tokens: Token budget of the timed generation.
             
         Returns:
-            Performance metrics.
+            Performance metrics (times in seconds).
         """
-        import time
+        run_tag = os.urandom(4).hex()
         
         # Test embedding speed
-        start = time.time()
-        self.embeddings.embed_query(test_query)
-        embed_time = time.time() - start
+        start = time.perf_counter_ns()
+        query_embedding = self.embeddings.embed_query(f"{test_query} [{run_tag}]")
+        embed_time = (time.perf_counter_ns() - start) / 1e9
+        
+        # Test search speed on its own
+        search_times = []
+        for _ in range(num_queries):
+            start = time.perf_counter_ns()
+            self.vector_store.search(
+                test_query, top_k=5, hybrid_search=False, query_embedding=query_embedding
+            )
+            search_times.append((time.perf_counter_ns() - start) / 1e9)
+        
+        # Test generation speed; the budget bounds the answer length, so
+        # timings are comparable between runs
+        start = time.perf_counter_ns()
+        generation = self.llm.generate("Test prompt", max_tokens=max_tokens)
+        gen_time = (time.perf_counter_ns() - start) / 1e9
         
-        # Test search speed
-        start = time.time()
-        results = self.vector_store.search(test_query, top_k=5)
-        search_time = time.time() - start
+        # Retrieval throughput; distinct queries so the embedding caches miss
+        def retrieve(i: int) -> float:
+            t0 = time.perf_counter_ns()
+            query = f"{test_query} [{run_tag}-{i}]"
+            self.vector_store.search(
+                query, top_k=5, query_embedding=self.embeddings.embed_query(query)
+            )
+            return (time.perf_counter_ns() - t0) / 1e9
         
-        # Test generation speed
-        start = time.time()
-        self.llm.generate("Test prompt", max_tokens=100)
-        gen_time = time.time() - start
+        start = time.perf_counter_ns()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            retrieval_times = list(executor.map(retrieve, range(num_queries)))
+        wall_time = (time.perf_counter_ns() - start) / 1e9
         
+        search_time = float(np.percentile(search_times, 50))
         return {
             "embedding_time": embed_time,
             "search_time": search_time,
+            "search_p50": search_time,
+            "search_p95": float(np.percentile(search_times, 95)),
+            "retrieval_p50": float(np.percentile(retrieval_times, 50)),
+            "retrieval_p95": float(np.percentile(retrieval_times, 95)),
+            "throughput_qps": num_queries / wall_time if wall_time else 0.0,
             "generation_time": gen_time,
+            "generation_tokens": generation.tokens_generated,
             "total_time": embed_time + search_time + gen_time,
             "cost": 0.0
         }
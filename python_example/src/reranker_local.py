@@ -0,0 +1,127 @@
+"""Local cross-encoder reranking for the second retrieval stage."""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxCrossEncoder:
+    """Cross-encoder exported to ONNX and quantized to INT8, for reranking.
+
+    A cross-encoder reads the query and a passage together, so it judges
+    relevance far better than comparing two independently computed
+    embeddings - but it costs a forward pass per pair. It is therefore only
+    run on the handful of candidates the vector search already shortlisted.
+    Like OnnxEmbeddings, the export is cached on disk and done once.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        cache_dir: Optional[str] = None,
+        batch_size: int = 32,
+        quantize: bool = True
+    ):
+        """
+        Initialize the ONNX cross-encoder.
+
+        Args:
+            model_name: HuggingFace cross-encoder model name.
+            cache_dir: Directory for exported ONNX models.
+            batch_size: Query-passage pairs scored per forward pass.
+            quantize: Quantize the exported model to INT8.
+        """
+        try:
+            import onnxruntime as ort
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise ImportError(
+                "optimum[onnxruntime] not installed. Run:\n"
+                "pip install \"optimum[onnxruntime]\""
+            )
+
+        if cache_dir is None:
+            cache_dir = str(Path(__file__).parent.parent / "data" / "onnx_models")
+        save_dir = Path(cache_dir) / model_name.replace("/", "__")
+        file_name = "model_quantized.onnx" if quantize else "model.onnx"
+
+        # Export (and quantize) once; later runs load straight from disk
+        if not (save_dir / file_name).exists():
+            logger.info(f"Exporting {model_name} to ONNX (one-time)...")
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            model.save_pretrained(save_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(save_dir)
+            if quantize:
+                quantizer = ORTQuantizer.from_pretrained(model)
+                qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+                quantizer.quantize(save_dir=save_dir, quantization_config=qconfig)
+
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = os.cpu_count() or 1
+        self.model = ORTModelForSequenceClassification.from_pretrained(
+            save_dir,
+            file_name=file_name,
+            provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(save_dir)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        logger.info(f"Loaded ONNX reranker: {model_name} ({file_name})")
+
+    def score(self, query: str, documents: List[str]) -> np.ndarray:
+        """
+        Relevance of each document to the query.
+
+        Args:
+            query: User query.
+            documents: Candidate passages.
+
+        Returns:
+            float32 array of scores in (0, 1), one per document.
+        """
+        logits = np.empty(len(documents), dtype=np.float32)
+        # Batch passages of similar length together so little compute goes to padding
+        order = sorted(range(len(documents)), key=lambda i: len(documents[i]))
+        for i in range(0, len(order), self.batch_size):
+            rows = order[i:i + self.batch_size]
+            inputs = self.tokenizer(
+                [query] * len(rows),
+                [documents[j] for j in rows],
+                padding=True,
+                truncation=True,
+                return_tensors="np"
+            )
+            output = np.asarray(self.model(**inputs).logits, dtype=np.float32)
+            logits[rows] = output[:, 0]
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def rerank(
+        self,
+        query: str,
+        results: List[Tuple[str, float, Dict[str, Any]]],
+        top_k: int
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Reorder search results by cross-encoder relevance.
+
+        Args:
+            query: User query.
+            results: (document, score, metadata) tuples from the vector store.
+            top_k: Number of results to keep.
+
+        Returns:
+            The best ``top_k`` results, scored by the cross-encoder.
+        """
+        if not results:
+            return []
+        scores = self.score(query, [doc for doc, _, _ in results])
+        best = np.argsort(-scores, kind="stable")[:top_k]
+        return [(results[i][0], float(scores[i]), results[i][2]) for i in best]
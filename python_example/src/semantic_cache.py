@@ -0,0 +1,125 @@
+"""Semantic cache - reuse retrieval results for near-duplicate queries."""
+
+import os
+from typing import Any, Hashable, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Approximate cache keyed by query embedding similarity.
+
+    Paraphrased questions ("What is RAG?" vs "what is rag") embed to nearly
+    the same vector, so their retrieval results can be shared. The last
+    ``capacity`` query embeddings are kept L2-normalised and quantized to
+    int8 (with a float32 scale per vector) in one contiguous matrix; a
+    lookup is a single integer matrix-vector product.
+    """
+
+    # Environment variable overriding the cosine similarity threshold
+    THRESHOLD_ENV = "RAG_SEMANTIC_CACHE_THRESHOLD"
+    DEFAULT_THRESHOLD = 0.97
+
+    def __init__(self, capacity: int = 256, threshold: Optional[float] = None):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            capacity: Number of recent queries to remember (FIFO eviction).
+            threshold: Minimum cosine similarity for a hit. Defaults to
+                $RAG_SEMANTIC_CACHE_THRESHOLD, or 0.97.
+        """
+        if threshold is None:
+            threshold = float(os.getenv(self.THRESHOLD_ENV, self.DEFAULT_THRESHOLD))
+        self.capacity = capacity
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def clear(self):
+        """Forget all cached queries (call whenever the corpus changes)."""
+        # Matrix is allocated on first insert, once the dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._keys: List[Hashable] = [None] * self.capacity
+        self._values: List[Any] = [None] * self.capacity
+        self._size = 0
+        self._next = 0
+
+    @staticmethod
+    def _quantize(embedding: List[float]) -> Optional[Tuple[np.ndarray, float]]:
+        """Unit-normalise and quantize to int8; returns (vector, scale)."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if not norm:
+            return None
+        vec = vec / norm
+        scale = float(np.abs(vec).max()) / 127.0
+        return np.round(vec / scale).astype(np.int8), scale
+
+    def get(self, embedding: List[float], key: Hashable = None) -> Optional[Any]:
+        """
+        Look up the value stored for a similar query.
+
+        Args:
+            embedding: Query embedding.
+            key: Extra parameters that must match exactly (e.g. top_k).
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        quantized = self._quantize(embedding)
+        if (
+            quantized is None
+            or self._vectors is None
+            or quantized[0].shape[0] != self._vectors.shape[1]
+        ):
+            self.misses += 1
+            return None
+
+        # Integer dot products, rescaled to cosine similarities; einsum
+        # accumulates in int32 without materialising an int32 copy of the matrix
+        vec, scale = quantized
+        n = self._size
+        dots = np.einsum("ij,j->i", self._vectors[:n], vec, dtype=np.int32)
+        scores = dots.astype(np.float32) * (self._scales[:n] * scale)
+        # Best-scoring candidate above the threshold whose key matches; only
+        # the (usually zero or one) entries over the threshold are sorted
+        above = np.flatnonzero(scores >= self.threshold)
+        for idx in above[np.argsort(-scores[above], kind="stable")]:
+            if self._keys[idx] == key:
+                self.hits += 1
+                logger.debug(f"Semantic cache hit (similarity {scores[idx]:.3f})")
+                return self._values[idx]
+
+        self.misses += 1
+        return None
+
+    def put(self, embedding: List[float], value: Any, key: Hashable = None):
+        """
+        Remember a value for a query embedding, evicting the oldest if full.
+
+        Args:
+            embedding: Query embedding.
+            value: Value to return for similar queries.
+            key: Extra parameters that must match exactly on lookup.
+        """
+        quantized = self._quantize(embedding)
+        if quantized is None:
+            return
+        vec, scale = quantized
+        if self._vectors is None or vec.shape[0] != self._vectors.shape[1]:
+            self.clear()
+            self._vectors = np.zeros((self.capacity, vec.shape[0]), dtype=np.int8)
+            self._scales = np.zeros(self.capacity, dtype=np.float32)
+
+        self._vectors[self._next] = vec
+        self._scales[self._next] = scale
+        self._keys[self._next] = key
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
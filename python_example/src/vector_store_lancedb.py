@@ -1,17 +1,43 @@
 """LanceDB vector store for local, zero-cost RAG with superior performance."""
 
 import os
+import math
 from typing import List, Dict, Any, Optional, Tuple
 import lancedb
 import pyarrow as pa
 import numpy as np
 from pathlib import Path
 import logging
-import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import json
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _dump_metadata(metadata: Dict[str, Any]) -> str:
+    """Serialize chunk metadata to JSON text (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(
+            metadata, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+    return json.dumps(metadata)
+
+
+def _load_metadata(data: str) -> Dict[str, Any]:
+    """Parse chunk metadata JSON text (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class LanceDBVectorStore:
     """LanceDB-based vector store for high-performance local RAG.
     
@@ -23,12 +49,38 @@ class LanceDBVectorStore:
     - Production-grade performance on local hardware
     """
     
+    # Metadata keys also stored as typed columns so filters run inside LanceDB
+    FILTER_COLUMNS = {
+        "document_type": pa.string(),
+        "source": pa.string(),
+        "document_index": pa.int64(),
+    }
+    
+    # Supported storage precisions for the vector column
+    VECTOR_DTYPES = ("float32", "float16")
+    
+    # Vector distance for searches and the ANN index; scores are 1 - distance
+    DISTANCE_TYPE = "cosine"
+    
+    # Columns a vector search reads back (never the vectors themselves)
+    RESULT_COLUMNS = ["text", "metadata", "_distance"]
+    
+    # Unfiltered vector searches on tables up to this size are answered
+    # exactly from an in-memory matrix instead of a LanceDB scan (0 disables)
+    EXACT_SEARCH_MAX_ROWS = 20_000
+    
+    # Fewest int8 (IVF_SQ) candidates re-scored against the stored vectors
+    RERANK_CANDIDATES = 200
+    
     def __init__(
         self,
         collection_name: str = "rag_documents",
         persist_directory: Optional[str] = None,
         embeddings: Optional[Any] = None,
-        embedding_dim: int = 384  # For all-MiniLM-L6-v2
+        embedding_dim: int = 384,  # For all-MiniLM-L6-v2
+        max_batch: int = 2048,
+        index_threshold: int = 10_000,
+        vector_dtype: str = "float32"
     ):
         """
         Initialize LanceDB vector store.
@@ -38,9 +90,34 @@ class LanceDBVectorStore:
             persist_directory: Directory to persist the database.
             embeddings: Embeddings instance (will be Ollama).
             embedding_dim: Dimension of embeddings.
+            max_batch: Most texts embedded and written per batch on ingest.
+            index_threshold: Row count at which an ANN index is built
+                automatically (rebuilt whenever the table doubles); 0 disables.
+                Never below EXACT_SEARCH_MAX_ROWS: smaller tables are searched
+                exactly in memory, so an index there would go unused.
+            vector_dtype: Storage precision for new tables: "float32" or
+                "float16" (half the disk and scan bandwidth). Existing tables
+                keep the precision they were created with.
         """
+        if vector_dtype not in self.VECTOR_DTYPES:
+            raise ValueError(f"vector_dtype must be one of {self.VECTOR_DTYPES}")
         self.embeddings = embeddings
         self.embedding_dim = embedding_dim
+        self.max_batch = max_batch
+        self.index_threshold = index_threshold
+        self.vector_dtype = vector_dtype
+        # Row count when the ANN index was last built (None = not checked yet)
+        self._indexed_rows: Optional[int] = None
+        self._fts_ready = False
+        # Cached row count; this class owns every write, so it is kept in step
+        self._row_count: Optional[int] = None
+        # In-memory copy for exact search: (unit vectors, text, metadata)
+        self._exact: Optional[Tuple[np.ndarray, pa.Array, pa.Array]] = None
+        # Serialises loads of the copy; the state lock guards the copy and
+        # its write generation, so writers never wait for a load
+        self._exact_lock = threading.Lock()
+        self._exact_state_lock = threading.Lock()
+        self._exact_generation = 0
         self.collection_name = collection_name
         
         # Set up persistence directory
@@ -59,16 +136,21 @@ class LanceDBVectorStore:
     def _ensure_table(self):
         """Ensure table exists, creating if necessary."""
         if self.table is None:
-            if self.collection_name in self.db.table_names():
+            # Opened directly: table_names() pages (10 names by default), so a
+            # membership test misses tables in a database with many of them
+            try:
                 self.table = self.db.open_table(self.collection_name)
-                logger.info(f"Opened existing LanceDB table: {self.collection_name}")
-            # Table will be created on first add
+            except (ValueError, FileNotFoundError):
+                # Table will be created on first add
+                return
+            logger.info(f"Opened existing LanceDB table: {self.collection_name}")
     
     def add_documents(
         self,
         texts: List[str],
         metadatas: Optional[List[Dict[str, Any]]] = None,
-        ids: Optional[List[str]] = None
+        ids: Optional[List[str]] = None,
+        refresh: bool = True
     ) -> List[str]:
         """
         Add documents to the vector store with batched processing.
@@ -76,30 +158,52 @@ class LanceDBVectorStore:
         Args:
             texts: List of document texts.
             metadatas: Optional metadata for each document.
-            ids: Optional IDs for documents.
+            ids: Optional IDs for documents. Defaults to a hash of the text,
+                so re-ingesting the same chunks does not store them twice.
+            refresh: Update the indexes afterwards (see refresh_indexes());
+                callers adding many small batches can pass False and refresh
+                once at the end.
             
         Returns:
-            List of document IDs.
+            List of document IDs (including ones that were already stored).
         """
         if not texts:
             return []
         
-        # Generate IDs if not provided
+        # Generate content-addressed IDs if not provided
         if ids is None:
-            ids = [str(uuid.uuid4()) for _ in texts]
+            ids = [self._content_id(text) for text in texts]
         
         # Prepare metadata
         if metadatas is None:
             metadatas = [{} for _ in texts]
         
-        # Batch processing for efficiency
-        batch_size = 100
+        # One embedding call and one columnar write per (large) batch
+        batch_size = self.max_batch
         all_ids = []
         
+        added = 0
+        
         for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i + batch_size]
             batch_ids = ids[i:i + batch_size]
-            batch_metadatas = metadatas[i:i + batch_size]
+            all_ids.extend(batch_ids)
+            
+            # Skip rows that are already stored (or repeated in this batch)
+            # before paying for their embeddings
+            if self.table is None:
+                self._ensure_table()
+            seen = self._existing_ids(batch_ids)
+            keep = []
+            for j, doc_id in enumerate(batch_ids, i):
+                if doc_id not in seen:
+                    seen.add(doc_id)
+                    keep.append(j)
+            if not keep:
+                logger.info(f"Batch {i//batch_size + 1} already stored, skipping")
+                continue
+            batch_ids = [ids[j] for j in keep]
+            batch_texts = [texts[j] for j in keep]
+            batch_metadatas = [metadatas[j] for j in keep]
             
             # Generate embeddings for batch
             if self.embeddings:
@@ -107,47 +211,185 @@ class LanceDBVectorStore:
                 embeddings = self.embeddings.embed_documents(batch_texts)
             else:
                 # Fallback: create fixed-size embeddings
-                embeddings = [[0.0] * self.embedding_dim for _ in batch_texts]
+                embeddings = np.zeros((len(batch_texts), self.embedding_dim), dtype=np.float32)
             
-            # Prepare data for insertion
-            import json
-            import pandas as pd
-            from datetime import datetime
-            
-            data = []
-            for text, embedding, metadata, doc_id in zip(
-                batch_texts, embeddings, batch_metadatas, batch_ids
-            ):
-                data.append({
-                    "id": doc_id,
-                    "text": text,
-                    "vector": embedding,
-                    "metadata": json.dumps(metadata),
-                    "timestamp": datetime.now()
-                })
+            batch = self._make_batch(
+                batch_ids, batch_texts, embeddings, batch_metadatas, self._table_vector_dtype()
+            )
             
             # Create or add to table
             if self.table is None:
                 # Create table with first batch of data
-                self.table = self.db.create_table(self.collection_name, data)
+                self.table = self.db.create_table(self.collection_name, batch)
                 logger.info(f"Created new LanceDB table: {self.collection_name}")
             else:
-                # Add to existing table
-                self.table.add(data)
-            
-            all_ids.extend(batch_ids)
+                # Add to existing table (tables from older versions lack the
+                # filter columns; metadata stays complete in the JSON column)
+                existing = set(self.table.schema.names)
+                if not existing.issuperset(batch.column_names):
+                    batch = batch.select([n for n in batch.column_names if n in existing])
+                self.table.add(batch)
             
+            added += len(batch_ids)
+            self._invalidate_exact()
+            if self._row_count is not None:
+                self._row_count += len(batch_ids)
             logger.info(f"Added batch {i//batch_size + 1} ({len(batch_texts)} documents)")
         
-        logger.info(f"Added {len(texts)} documents total to LanceDB")
+        logger.info(f"Added {added} documents total to LanceDB ({len(texts) - added} already present)")
+        if added and refresh:
+            self.refresh_indexes()
         return all_ids
     
+    def refresh_indexes(self):
+        """Fold newly added rows into the indexes, building the ANN index when due."""
+        if self.table is None:
+            return
+        if self._fts_ready:
+            # FTS only sees indexed rows
+            self.table.optimize()
+        self._maybe_create_index()
+    
+    def _table_vector_dtype(self) -> str:
+        """Precision of the vector column (the configured one for a new table)."""
+        if self.table is None:
+            return self.vector_dtype
+        value_type = self.table.schema.field("vector").type.value_type
+        return "float16" if pa.types.is_float16(value_type) else "float32"
+    
+    @staticmethod
+    def _content_id(text: str) -> str:
+        """Deterministic document ID derived from the text."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _existing_ids(self, ids: List[str]) -> set:
+        """Subset of ``ids`` already stored in the table."""
+        if self.table is None or not ids:
+            return set()
+        values = ", ".join("'" + str(doc_id).replace("'", "''") + "'" for doc_id in ids)
+        found = (
+            self.table.search()
+            .where(f"id IN ({values})")
+            .select(["id"])
+            .limit(len(ids))
+            .to_arrow()
+        )
+        return set(found.column("id").to_pylist())
+    
+    def _ensure_fts_index(self):
+        """Create the full-text index on ``text`` used by hybrid search (once)."""
+        if self._fts_ready:
+            return
+        try:
+            names = [getattr(idx, "name", "") for idx in self.table.list_indices()]
+        except Exception:
+            names = []
+        if "text_idx" not in names:
+            self.table.create_fts_index("text", replace=True)
+        self._fts_ready = True
+    
+    def _maybe_create_index(self):
+        """Build the ANN index once the table is big enough, and after it doubles."""
+        if not self.index_threshold or self.table is None:
+            return
+        n = self.get_document_count()
+        if n <= self.EXACT_SEARCH_MAX_ROWS:
+            # Still answered by exact in-memory search
+            return
+        if self._indexed_rows is None:
+            self._indexed_rows = n if self._has_vector_index() else 0
+        if n < self.index_threshold or n < 2 * self._indexed_rows:
+            return
+        logger.info(f"Table has {n} rows; building ANN index")
+        self.create_index()
+    
+    def _has_vector_index(self) -> bool:
+        """Whether the table has an ANN index built for DISTANCE_TYPE."""
+        try:
+            indices = self.table.list_indices()
+        except Exception:
+            return False
+        for idx in indices:
+            if "vector" not in getattr(idx, "columns", []):
+                continue
+            details = getattr(idx, "index_details", None) or {}
+            # An index built for another metric (older tables used L2) is
+            # bypassed by LanceDB, so it counts as missing and gets rebuilt
+            metric = details.get("metric_type", self.DISTANCE_TYPE)
+            return metric.lower() == self.DISTANCE_TYPE
+        return False
+    
+    @classmethod
+    def _make_batch(
+        cls,
+        ids: List[str],
+        texts: List[str],
+        embeddings: Any,
+        metadatas: List[Dict[str, Any]],
+        vector_dtype: str = "float32"
+    ) -> pa.Table:
+        """Build a columnar Arrow table for one batch of rows."""
+        vectors = np.asarray(embeddings, dtype=vector_dtype)
+        # One timestamp for the whole batch, repeated without a per-row list
+        timestamp = pa.scalar(datetime.now(), type=pa.timestamp("us"))
+        return pa.table({
+            "id": pa.array(ids, type=pa.string()),
+            "text": pa.array(texts, type=pa.string()),
+            "vector": pa.FixedSizeListArray.from_arrays(
+                pa.array(vectors.ravel()), vectors.shape[1]
+            ),
+            "metadata": pa.array(
+                [_dump_metadata(m) if m else "{}" for m in metadatas], type=pa.string()
+            ),
+            **{
+                key: pa.array(
+                    [cls._column_value(m.get(key), type_) for m in metadatas], type=type_
+                )
+                for key, type_ in cls.FILTER_COLUMNS.items()
+            },
+            "timestamp": pa.repeat(timestamp, len(ids)),
+        })
+    
+    @staticmethod
+    def _column_value(value: Any, type_: pa.DataType) -> Any:
+        """Value for a typed filter column, or None if it doesn't fit the type."""
+        if pa.types.is_string(type_):
+            return value if isinstance(value, str) else None
+        if isinstance(value, bool) or not isinstance(value, int):
+            return None
+        return value
+    
+    def _where_clause(self, filter_metadata: Dict[str, Any]) -> Optional[str]:
+        """
+        Translate a metadata filter into a LanceDB SQL predicate.
+        
+        Returns None when some key has no typed column in this table (or
+        the value doesn't fit it), in which case the caller filters in Python.
+        """
+        names = set(self.table.schema.names)
+        clauses = []
+        for key, value in filter_metadata.items():
+            type_ = self.FILTER_COLUMNS.get(key)
+            if type_ is None or key not in names:
+                return None
+            if self._column_value(value, type_) is None:
+                return None
+            if isinstance(value, str):
+                literal = "'" + value.replace("'", "''") + "'"
+            else:
+                literal = str(value)
+            clauses.append(f"{key} = {literal}")
+        return " AND ".join(clauses)
+    
     def search(
         self,
         query: str,
         top_k: int = 5,
         filter_metadata: Optional[Dict[str, Any]] = None,
-        hybrid_search: bool = True
+        hybrid_search: bool = True,
+        query_embedding: Optional[List[float]] = None,
+        nprobes: int = 20,
+        refine_factor: Optional[int] = 10
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
         """
         Search for similar documents with optional hybrid search.
@@ -157,9 +399,16 @@ class LanceDBVectorStore:
             top_k: Number of results to return.
             filter_metadata: Optional metadata filter.
             hybrid_search: Use both vector and full-text search.
+            query_embedding: Precomputed embedding of the query, if any.
+            nprobes: IVF partitions probed when an ANN index exists.
+            refine_factor: Re-rank this many times top_k candidates with exact
+                distances, and never fewer than RERANK_CANDIDATES (None to skip).
             
         Returns:
-            List of tuples (document, score, metadata).
+            List of tuples (document, score, metadata). The score is always
+            the cosine similarity between query and document vectors, so it
+            is comparable across modes; hybrid search only changes the
+            order (reciprocal rank fusion), not the score.
         """
         # Ensure table exists
         self._ensure_table()
@@ -167,79 +416,291 @@ class LanceDBVectorStore:
             logger.warning("No documents in vector store")
             return []
         
-        # Generate query embedding
-        if self.embeddings:
-            query_embedding = self.embeddings.embed_query(query)
+        # Generate query embedding unless the caller already has one
+        if query_embedding is None:
+            if self.embeddings:
+                query_embedding = self.embeddings.embed_query(query)
+            else:
+                # Fallback: create fixed-size embedding
+                query_embedding = np.zeros(self.embedding_dim, dtype=np.float32)
+        
+        # Metadata filter is pushed into the scan when possible
+        where = self._where_clause(filter_metadata) if filter_metadata else None
+        limit = top_k * 2 if filter_metadata and where is None else top_k
+        
+        tbl = None
+        if hybrid_search and query.strip():
+            # Vector + BM25 in one LanceDB query, fused by reciprocal rank
+            try:
+                self._ensure_fts_index()
+                results = (
+                    self.table.search(query_type="hybrid")
+                    .vector(query_embedding)
+                    .text(query)
+                    .distance_type(self.DISTANCE_TYPE)
+                    .limit(limit)
+                )
+                if where:
+                    results = results.where(where, prefilter=True)
+                tbl = results.to_arrow()
+            except Exception as e:
+                logger.debug(f"Hybrid search unavailable ({e}), using vector search")
+        
+        if tbl is None and where is None and not filter_metadata:
+            tbl = self._exact_search(query_embedding, top_k)
+        
+        if tbl is None:
+            # Vector search
+            results = (
+                self.table.search(query_embedding)
+                .distance_type(self.DISTANCE_TYPE)
+                .select(self.RESULT_COLUMNS)
+                .limit(limit)
+            )
+            if self._indexed_rows:
+                results = results.nprobes(nprobes)
+                if refine_factor:
+                    # Quantized distances only shortlist; small top_k values
+                    # would otherwise re-rank too few rows to recover recall
+                    refine_factor = max(refine_factor, -(-self.RERANK_CANDIDATES // limit))
+                    results = results.refine_factor(refine_factor)
+            if where:
+                results = results.where(where, prefilter=True)
+            tbl = results.to_arrow()
+        
+        python_filter = bool(filter_metadata) and where is None
+        if not python_filter:
+            # Never convert rows that would be discarded
+            tbl = tbl.slice(0, top_k)
+        
+        texts = tbl.column("text").to_pylist()
+        metadata_strs = tbl.column("metadata").to_pylist()
+        if "_distance" in tbl.column_names:
+            scores = (1.0 - np.asarray(tbl.column("_distance"), dtype=np.float64)).tolist()
+        elif "vector" in tbl.column_names:
+            # Hybrid rows carry a rank-fusion score on a different scale (and
+            # no distance for text-only matches); score them by cosine instead
+            scores = self._cosine_scores(tbl.column("vector"), query_embedding)
         else:
-            # Fallback: create fixed-size embedding
-            query_embedding = [0.0] * self.embedding_dim
-        
-        # Vector search
-        results = self.table.search(query_embedding).limit(top_k * 2 if hybrid_search else top_k)
-        
-        if filter_metadata:
-            # Apply metadata filtering
-            import json
-            filtered_results = []
-            for result in results.to_pandas().itertuples():
-                meta = json.loads(result.metadata)
-                if all(meta.get(k) == v for k, v in filter_metadata.items()):
-                    filtered_results.append(result)
-                if len(filtered_results) >= top_k:
-                    break
-            results = filtered_results
+            scores = [0.5] * len(texts)
+        # Most chunks carry no metadata; skip parsing the empty ones
+        metadatas = (_load_metadata(m) if m and m != "{}" else {} for m in metadata_strs)
+        
+        if python_filter:
+            # Apply metadata filtering in one pass, parsing only until top_k match
+            wanted = filter_metadata.items()
+            formatted_results = []
+            for result in zip(texts, scores, metadatas):
+                if all(result[2].get(k) == v for k, v in wanted):
+                    formatted_results.append(result)
+                    if len(formatted_results) == top_k:
+                        break
         else:
-            results = results.to_pandas().itertuples()
-        
-        # If hybrid search, also do full-text search and merge
-        if hybrid_search:
-            # LanceDB supports full-text search natively
-            # This would be implemented with tantivy index
-            pass  # TODO: Implement when LanceDB adds FTS support
-        
-        # Format results
-        formatted_results = []
-        import json
-        for result in list(results)[:top_k]:
-            score = 1 / (1 + result._distance) if hasattr(result, '_distance') else 0.5
-            metadata = json.loads(result.metadata) if hasattr(result, 'metadata') else {}
-            formatted_results.append((result.text, score, metadata))
+            formatted_results = list(zip(texts, scores, metadatas))
         
         logger.debug(f"Found {len(formatted_results)} results for query")
         return formatted_results
     
+    @staticmethod
+    def _cosine_scores(vectors: pa.ChunkedArray, query_embedding: Any) -> List[float]:
+        """Cosine similarity of each stored vector to the query."""
+        column = vectors.combine_chunks()
+        if not len(column):
+            return []
+        matrix = column.flatten().to_numpy(zero_copy_only=False).reshape(len(column), -1)
+        matrix = matrix.astype(np.float32, copy=False)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        return ((matrix @ query) / np.maximum(norms, 1e-12)).astype(np.float64).tolist()
+    
+    def _exact_search(self, query_embedding: Any, top_k: int) -> Optional[pa.Table]:
+        """
+        Exact nearest neighbours from an in-memory copy of a small table.
+        
+        One matrix-vector product of unit vectors replaces the LanceDB query;
+        distances are cosine distances, as on the LanceDB path.
+        
+        Returns:
+            Table of text, metadata and _distance, or None if the table is
+            too large (or has no rows) for the in-memory path.
+        """
+        exact = self._exact_view()
+        if exact is None:
+            return None
+        vectors, texts, metadatas = exact
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if not len(texts) or query.shape[0] != vectors.shape[1]:
+            return None
+        
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        distances = 1.0 - vectors @ query
+        if top_k < len(distances):
+            candidates = np.argpartition(distances, top_k)[:top_k]
+        else:
+            candidates = np.arange(len(distances))
+        order = candidates[np.argsort(distances[candidates], kind="stable")]
+        return pa.table({
+            "text": texts.take(order),
+            "metadata": metadatas.take(order),
+            "_distance": pa.array(distances[order]),
+        })
+    
+    def _exact_view(self) -> Optional[Tuple[np.ndarray, pa.Array, pa.Array]]:
+        """
+        The in-memory copy used by exact search, loaded on first use.
+        
+        One read-only copy is shared by all searching threads; writes drop
+        it and the next search reloads it. A load that overlaps a write is
+        used for that search only, never stored.
+        
+        Returns:
+            (unit vectors, texts, metadata), or None if the table is too
+            large for the in-memory path.
+        """
+        if not self.EXACT_SEARCH_MAX_ROWS or self.get_document_count() > self.EXACT_SEARCH_MAX_ROWS:
+            return None
+        exact = self._exact
+        if exact is None:
+            with self._exact_lock:
+                exact = self._exact
+                if exact is None:
+                    generation = self._exact_generation
+                    exact = self._load_exact()
+                    with self._exact_state_lock:
+                        if generation == self._exact_generation:
+                            self._exact = exact
+        return exact
+    
+    def _invalidate_exact(self):
+        """Drop the in-memory copy after a write, including one still loading."""
+        with self._exact_state_lock:
+            self._exact_generation += 1
+            self._exact = None
+    
+    def warmup(self):
+        """Open the table and load the in-memory search copy ahead of the first query."""
+        if self.get_document_count() and self._exact_view() is not None:
+            logger.info(f"Loaded {self._row_count} vectors for in-memory search")
+    
+    def _load_exact(self) -> Tuple[np.ndarray, pa.Array, pa.Array]:
+        """Read vectors (as unit-length float32), texts and metadata."""
+        data = self.table.to_arrow().select(["vector", "text", "metadata"]).combine_chunks()
+        column = data.column("vector").chunk(0) if data.num_rows else None
+        if column is None:
+            vectors = np.empty((0, self.embedding_dim), dtype=np.float32)
+        else:
+            # One owned float32 copy (widened from float16 tables), normalised
+            # in place: no norm or quotient temporaries the size of the matrix
+            vectors = np.array(
+                column.flatten().to_numpy(zero_copy_only=False).reshape(len(column), -1),
+                dtype=np.float32
+            )
+        norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+        # Zero vectors (failed embeddings) stay zero: cosine distance 1
+        vectors /= norms.clip(1e-12)[:, None]
+        texts = data.column("text").combine_chunks()
+        metadatas = data.column("metadata").combine_chunks()
+        return vectors, texts, metadatas
+    
+    def batch_search(
+        self,
+        query_embeddings: List[List[float]],
+        queries: Optional[List[str]] = None,
+        top_k: int = 5,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        hybrid_search: bool = True,
+        max_workers: int = 8
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """
+        Search for several precomputed query embeddings in parallel.
+        
+        Args:
+            query_embeddings: One embedding per query.
+            queries: Query texts (used by hybrid search), aligned with the embeddings.
+            top_k: Number of results to return per query.
+            filter_metadata: Optional metadata filter applied to every query.
+            hybrid_search: Use both vector and full-text search.
+            max_workers: Concurrent searches.
+            
+        Returns:
+            One result list per query, in input order.
+        """
+        queries = queries or [""] * len(query_embeddings)
+        
+        def run(args):
+            query, embedding = args
+            return self.search(
+                query,
+                top_k=top_k,
+                filter_metadata=filter_metadata,
+                hybrid_search=hybrid_search,
+                query_embedding=embedding
+            )
+        
+        # LanceDB releases the GIL while scanning, so threads overlap searches
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(run, zip(queries, query_embeddings)))
+    
+    def _drop_table(self) -> bool:
+        """
+        Drop the table in one call (rows are never read back) and reset the
+        cached state. Returns whether a table existed.
+        """
+        try:
+            self.db.drop_table(self.collection_name)
+            dropped = True
+        except (ValueError, FileNotFoundError):
+            dropped = False
+        self.table = None
+        self._indexed_rows = None
+        self._fts_ready = False
+        self._row_count = 0
+        self._invalidate_exact()
+        return dropped
+    
     def delete_collection(self):
         """Delete the entire collection."""
-        if self.collection_name in self.db.table_names():
-            self.db.drop_table(self.collection_name)
+        if self._drop_table():
             logger.info(f"Deleted LanceDB table: {self.collection_name}")
-        self.table = None
     
     def get_document_count(self) -> int:
-        """Get the number of documents in the collection."""
-        self._ensure_table()
-        return len(self.table) if self.table else 0
+        """Get the number of documents in the collection (cached between writes)."""
+        if self._row_count is None:
+            self._ensure_table()
+            self._row_count = self.table.count_rows() if self.table is not None else 0
+        return self._row_count
     
     def clear(self):
         """Clear all documents from the collection."""
-        # Drop table if it exists
-        if self.collection_name in self.db.table_names():
-            self.db.drop_table(self.collection_name)
+        # The table is recreated with the first add
+        if self._drop_table():
             logger.info(f"Cleared all documents from {self.collection_name}")
-        self.table = None
     
-    def create_index(self, metric: str = "L2", nprobes: int = 20):
+    def create_index(
+        self,
+        metric: str = DISTANCE_TYPE,
+        nprobes: int = 20,
+        index_type: str = "IVF_SQ"
+    ):
         """
         Create an ANN index for faster search.
         
         Args:
-            metric: Distance metric (L2 or cosine).
+            metric: Distance metric. Searches use DISTANCE_TYPE; LanceDB
+                ignores an index built for a different metric.
             nprobes: Number of probes for IVF index.
+            index_type: LanceDB index type. The default "IVF_SQ" scalar-quantizes
+                vectors to int8 (4x less to scan); "IVF_PQ" compresses further
+                with product quantization at some cost in recall.
         """
-        # Create IVF-PQ index for fast ANN search
-        self.table.create_index(
-            metric=metric,
-            num_partitions=256,  # IVF partitions
-            num_sub_vectors=96   # PQ sub-vectors
-        )
-        logger.info(f"Created ANN index with metric={metric}")
+        n = self.get_document_count()
+        params = {
+            "metric": metric,
+            "num_partitions": max(1, int(math.sqrt(n))),  # IVF partitions
+            "index_type": index_type,
+        }
+        if index_type.endswith("PQ"):
+            params["num_sub_vectors"] = self.embedding_dim // 8  # PQ sub-vectors
+        self.table.create_index(**params)
+        self._indexed_rows = n
+        logger.info(f"Created {index_type} index with metric={metric}")
@@ -4,11 +4,15 @@ Test runner for the pure local RAG system.
 100% local, zero-cost operation with Ollama + LanceDB.
 """
 
+import contextlib
+import io
 import os
+import runpy
 import sys
 import subprocess
 import time
 from pathlib import Path
+from typing import Tuple
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -28,8 +32,41 @@ def check_environment():
     return False, 0
 
 
+def run_in_process(test_file: Path) -> Tuple[str, str]:
+    """Run a test script in this interpreter, reusing already-imported modules."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            runpy.run_path(str(test_file), run_name="__main__")
+        except SystemExit:
+            pass
+        except Exception as e:
+            print(f"[ERROR] {test_file.name} crashed: {e}", file=sys.stderr)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+def run_in_subprocess(test_file: Path) -> Tuple[str, str]:
+    """Run a test script in a fresh interpreter (for tests needing clean state)."""
+    env = os.environ.copy()
+    env['PYTHONIOENCODING'] = 'utf-8'
+    
+    result = subprocess.run(
+        [sys.executable, str(test_file)],
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        env=env
+    )
+    return result.stdout, result.stderr
+
+
 def main():
     """Main test runner for pure local RAG."""
+    # Tests print non-ASCII output; don't die on narrow console encodings
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    
     print("=" * 60)
     print(">>> PURE LOCAL RAG TEST RUNNER")
     print(">>> 100% Local | Zero Cost | No API Keys Required")
@@ -64,28 +101,21 @@ def main():
     
     start_time = time.time()
     
-    # Run the test with proper encoding
-    env = os.environ.copy()
-    env['PYTHONIOENCODING'] = 'utf-8'
-    
-    result = subprocess.run(
-        [sys.executable, str(test_file)],
-        capture_output=True,
-        text=True,
-        encoding='utf-8',
-        errors='replace',
-        env=env
-    )
+    # In-process by default; --isolated runs the test in a fresh interpreter
+    if "--isolated" in sys.argv[1:]:
+        stdout, stderr = run_in_subprocess(test_file)
+    else:
+        stdout, stderr = run_in_process(test_file)
     
     duration = time.time() - start_time
     
     # Print the output
-    print(result.stdout)
-    if result.stderr:
-        print("Errors:", result.stderr)
+    print(stdout)
+    if stderr:
+        print("Errors:", stderr)
     
     # Check if tests passed
-    output = result.stdout + result.stderr
+    output = stdout + stderr
     all_passed = "ALL TESTS PASSED" in output
     
     # Print summary
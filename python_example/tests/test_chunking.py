@@ -0,0 +1,144 @@
+"""Tests for the chunking module."""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.chunking import TextChunker, MarkdownChunker, iter_file_windows
+
+
+def _words(text):
+    """Word sequence with punctuation dropped, for content comparisons."""
+    return text.replace(".", "").replace(",", "").split()
+
+
+def test_small_paragraphs_are_packed_together():
+    """Test that paragraphs that fit are combined into one chunk."""
+    chunker = TextChunker(chunk_size=100, chunk_overlap=0)
+    chunks = chunker.chunk_text("First paragraph.\n\nSecond paragraph.")
+    assert [c.text for c in chunks] == ["First paragraph.\n\nSecond paragraph."]
+    assert chunks[0].metadata["total_chunks"] == 1
+
+
+def test_large_paragraph_is_split_on_sentences():
+    """Test that an oversized paragraph is cut at sentence boundaries."""
+    text = "This is a sentence about RAG. " * 20
+    chunker = TextChunker(chunk_size=100, chunk_overlap=0)
+    chunks = [c.text for c in chunker.chunk_text(text)]
+    assert len(chunks) > 1
+    assert all(len(c) <= 100 for c in chunks)
+    assert all(c.endswith(".") for c in chunks)
+    assert _words(" ".join(chunks)) == _words(text)
+
+
+def test_unbroken_text_falls_back_to_character_split():
+    """Test that text without separators is split by character count."""
+    chunker = TextChunker(chunk_size=10, chunk_overlap=0)
+    chunks = [c.text for c in chunker.chunk_text("x" * 35)]
+    assert chunks == ["x" * 10, "x" * 10, "x" * 10, "x" * 5]
+
+
+def test_markdown_sections_keep_headers():
+    """Test that markdown is chunked per section with header metadata."""
+    text = "# Title\nIntro text.\n## Details\nMore text."
+    chunks = MarkdownChunker(chunk_size=100, chunk_overlap=0).chunk_text(text)
+    assert [c.metadata["section_header"] for c in chunks] == ["Title", "Details"]
+    assert chunks[1].text == "## Details\nMore text."
+
+
+def test_chunk_texts_matches_serial_chunking():
+    """Test that batch chunking returns the same chunks, in input order."""
+    texts = [f"Document {i}. " * (i + 1) for i in range(8)]
+    metadatas = [{"doc": i} for i in range(8)]
+    chunker = TextChunker(chunk_size=40, chunk_overlap=0, max_workers=2)
+    batched = chunker.chunk_texts(texts, metadatas)
+    serial = [chunker.chunk_text(t, m) for t, m in zip(texts, metadatas)]
+    assert [[c.text for c in cs] for cs in batched] == [[c.text for c in cs] for cs in serial]
+    assert [cs[0].metadata["doc"] for cs in batched] == list(range(8))
+
+
+def test_chunk_cache_reuses_results(tmp_path):
+    """Test that cached chunking returns identical chunks without recomputing."""
+    text = "# Title\n" + "Some sentence here. " * 20
+    chunker = MarkdownChunker(chunk_size=60, chunk_overlap=10, cache_dir=str(tmp_path))
+    first = chunker.chunk_text(text, {"source": "a"})
+    assert list((tmp_path / "chunks").glob("*.pkl"))
+    
+    def _split_sections(text):
+        raise AssertionError("chunk cache miss")
+    
+    chunker._split_sections = _split_sections
+    second = chunker.chunk_text(text, {"source": "b"})
+    assert [c.text for c in second] == [c.text for c in first]
+    assert second[0].metadata["source"] == "b"
+
+
+def test_iter_file_windows_reassembles_file(tmp_path):
+    """Test that streamed windows cover the file exactly, split at paragraphs."""
+    text = "Première ligne.\n\n" + "Paragraph with ünïcode.\n\n" * 50
+    path = tmp_path / "doc.txt"
+    path.write_text(text, encoding="utf-8")
+    windows = list(iter_file_windows(str(path), window_size=100))
+    assert len(windows) > 1
+    assert "".join(windows) == text
+    assert all(w.endswith("\n\n") for w in windows[:-1])
+
+
+def test_cached_documents_skip_the_process_pool(tmp_path, monkeypatch):
+    """Test that re-chunking cached documents never starts worker processes."""
+    texts = [f"Document {i}. " * (i + 10) for i in range(6)]
+    chunker = TextChunker(chunk_size=40, chunk_overlap=0, max_workers=2, cache_dir=str(tmp_path))
+    first = chunker.chunk_texts(texts)
+    
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started for cached documents")
+    
+    monkeypatch.setattr("src.chunking.ProcessPoolExecutor", no_pool)
+    second = chunker.chunk_texts(texts)
+    assert [[c.text for c in cs] for cs in second] == [[c.text for c in cs] for cs in first]
+
+
+def test_small_batches_are_chunked_in_process(monkeypatch):
+    """Test that a few uncached documents never pay for worker start-up."""
+    texts = [f"Document {i}. " * 50 for i in range(8)]
+    chunker = TextChunker(chunk_size=40, chunk_overlap=0, max_workers=8)
+    
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started for a small batch")
+    
+    monkeypatch.setattr("src.chunking.ProcessPoolExecutor", no_pool)
+    assert len(chunker.chunk_texts(texts)) == 8
+    assert len(list(chunker.iter_chunk_stream(texts))) == 8
+
+
+def test_pool_workers_capped_by_document_count(monkeypatch):
+    """Test that the pool never starts more workers than there are documents."""
+    started = []
+    
+    def pool(max_workers, mp_context=None):
+        started.append(max_workers)
+        return ThreadPoolExecutor(max_workers)
+    
+    monkeypatch.setattr("src.chunking.ProcessPoolExecutor", pool)
+    monkeypatch.setattr(TextChunker, "POOL_MIN_CHARS", 0)
+    texts = [f"Document {i}. " * 20 for i in range(3)]
+    chunker = TextChunker(chunk_size=40, chunk_overlap=0, max_workers=8)
+    batched = chunker.chunk_texts(texts)
+    assert started == [3]
+    assert [[c.text for c in cs] for cs in batched] == [
+        [c.text for c in chunker.chunk_text(t)] for t in texts
+    ]
+
+
+def test_expired_chunk_cache_files_are_pruned(tmp_path):
+    """Test that cache files older than the TTL are deleted on start-up."""
+    chunker = TextChunker(chunk_size=40, chunk_overlap=0, cache_dir=str(tmp_path))
+    chunker.chunk_text("Old document. " * 10)
+    old = next((tmp_path / "chunks").glob("*.pkl"))
+    stale = time.time() - TextChunker.CACHE_TTL - 60
+    os.utime(old, (stale, stale))
+    chunker.chunk_text("New document. " * 10)
+    
+    TextChunker(chunk_size=40, chunk_overlap=0, cache_dir=str(tmp_path))
+    remaining = list((tmp_path / "chunks").glob("*.pkl"))
+    assert len(remaining) == 1 and old not in remaining
@@ -0,0 +1,42 @@
+"""Tests for the Ollama LLM client."""
+
+import json
+
+from src.llm_local import OllamaLLM
+
+
+class _Response:
+    """Minimal non-streaming /api/generate reply."""
+    status_code = 200
+    content = b'{"response": "ok", "eval_count": 1, "total_duration": 0}'
+
+
+def _client(monkeypatch, **kwargs):
+    """OllamaLLM whose server probe and POSTs are faked; returns (llm, bodies)."""
+    monkeypatch.setattr("src.llm_local.ollama_models", lambda base_url: ("tinyllama:latest",))
+    llm = OllamaLLM(**kwargs)
+    bodies = []
+    
+    def post(url, data=None, stream=False):
+        bodies.append(json.loads(data))
+        return _Response()
+    
+    llm._session.post = post
+    return llm, bodies
+
+
+def test_generation_limits_are_sent_as_options(monkeypatch):
+    """Test that max_tokens and temperature reach Ollama under "options"."""
+    llm, bodies = _client(monkeypatch, temperature=0.7, max_tokens=2048)
+    assert llm.generate("warmup", max_tokens=1, temperature=0).answer == "ok"
+    llm.generate("default settings")
+    assert bodies[0]["options"] == {"temperature": 0, "num_predict": 1}
+    assert bodies[1]["options"] == {"temperature": 0.7, "num_predict": 2048}
+    assert "num_predict" not in bodies[0] and "temperature" not in bodies[0]
+
+
+def test_context_generation_forwards_limits(monkeypatch):
+    """Test that generate_with_context passes its overrides through."""
+    llm, bodies = _client(monkeypatch, temperature=0.7, max_tokens=2048)
+    llm.generate_with_context("q", "ctx", max_tokens=150, temperature=0.2)
+    assert bodies[0]["options"] == {"temperature": 0.2, "num_predict": 150}
@@ -63,12 +63,23 @@ def test_llm():
     
     try:
         from src.llm_local import OllamaLLM
+        from src.ollama_api import ollama_models
         
-        # Try different models in order of preference
+        # Try different models in order of preference, skipping any that
+        # are not installed (the /api/tags probe is cached per process)
         models_to_try = ["mistral", "phi", "llama2", "mistral:7b"]
+        try:
+            installed = ollama_models("http://localhost:11434")
+        except ConnectionError as e:
+            print(f"[FAIL] {e}")
+            return False
+        candidates = [
+            m for m in models_to_try
+            if any(name == m or name.startswith(m + ":") for name in installed)
+        ]
         llm = None
         
-        for model in models_to_try:
+        for model in candidates:
             try:
                 llm = OllamaLLM(model=model)
                 print(f"  Using model: {model}")
@@ -80,6 +91,10 @@ def test_llm():
             print("[FAIL] No LLM models available. Run: ollama pull mistral")
             return False
         
+        # Load the model before timing so the measurement excludes cold start
+        # (max_tokens=1 caps the warm-up at a single token)
+        llm.generate(prompt=" ", max_tokens=1)
+        
         # Test generation
         start = time.time()
         response = llm.generate(
@@ -251,6 +266,8 @@ def main():
         ("Full Pipeline", test_full_pipeline)
     ]
     
+    # Every test waits on the same Ollama instance and prints its own
+    # timings, so run them one at a time to keep those numbers meaningful
     results = []
     for name, test_func in tests:
         try:
@@ -0,0 +1,37 @@
+"""Tests for the shared Ollama probes."""
+
+from src import ollama_api
+
+
+class _Tags:
+    """Minimal /api/tags reply."""
+    status_code = 200
+    
+    def __init__(self, names):
+        self._names = names
+    
+    def json(self):
+        return {"models": [{"name": n} for n in self._names]}
+
+
+def test_model_listing_expires_and_uses_timeout(monkeypatch):
+    """Test that /api/tags is probed with a timeout and re-read after the TTL."""
+    installed = ["mistral:7b"]
+    calls = []
+    
+    def get(url, timeout=None):
+        calls.append(timeout)
+        return _Tags(list(installed))
+    
+    clock = [100.0]
+    monkeypatch.setattr(ollama_api._session, "get", get)
+    monkeypatch.setattr(ollama_api.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(ollama_api, "_models_cache", {})
+    
+    url = "http://ollama.test:11434"
+    assert ollama_api.ollama_models(url) == ("mistral:7b",)
+    installed.append("phi:latest")
+    assert ollama_api.ollama_models(url) == ("mistral:7b",)
+    clock[0] += ollama_api.MODELS_TTL
+    assert ollama_api.ollama_models(url) == ("mistral:7b", "phi:latest")
+    assert calls == [ollama_api.PROBE_TIMEOUT] * 2
@@ -0,0 +1,24 @@
+"""Tests for the semantic query cache."""
+
+from src.semantic_cache import SemanticCache
+
+
+def test_near_duplicate_query_hits():
+    """Test that a nearly identical embedding reuses the cached value."""
+    cache = SemanticCache(capacity=4, threshold=0.97)
+    cache.put([1.0, 0.0, 0.0], "results", key=5)
+    assert cache.get([1.0, 0.05, 0.0], key=5) == "results"
+    assert cache.get([1.0, 0.05, 0.0], key=3) is None
+    assert cache.get([0.0, 1.0, 0.0], key=5) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_oldest_entry_is_evicted_when_full():
+    """Test FIFO eviction once capacity is reached."""
+    cache = SemanticCache(capacity=2, threshold=0.97)
+    cache.put([1.0, 0.0], "a")
+    cache.put([0.0, 1.0], "b")
+    cache.put([-1.0, 0.0], "c")
+    assert cache.get([1.0, 0.0]) is None
+    assert cache.get([0.0, 1.0]) == "b"
+    assert cache.get([-1.0, 0.0]) == "c"